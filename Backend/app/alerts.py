@@ -0,0 +1,248 @@
+"""
+Streaming evaluation of alert_rules against readings as they are ingested.
+
+Enabled rules are compiled into an index by (device, sensor type), so each
+reading is checked only against its own device's rules for its sensor type.
+A small state machine per (device_id, rule_id) handles `duration_seconds`: a
+breach must persist that long before the alert opens, and the alert closes on
+the first non-breaching reading.
+Only state transitions reach the database, through a writer thread, so ingest
+never waits on alert writes.
+
+Rules are attached to an outlet through their sensor (alert_rules.sensor_id ->
+sensors.outlet_id -> device_outlets.id), and the outlet to its device
+(device_outlets.device_id -> devices.id, the UUID the device reports readings
+under). Rules without a sensor, or whose outlet or device is gone, are skipped.
+Alert timestamps are written as naive UTC, like the alerts table stores them.
+Alert state is in memory: alerts opened before a restart are not closed by
+readings after it.
+
+Enable with ALERTS_ENABLED=1; rules are reloaded every ALERT_RULES_REFRESH_SECONDS.
+"""
+import logging
+import operator
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Any, Optional
+from uuid import UUID
+
+from sqlalchemy import Text, cast, column, select, table, update
+
+from .database import SessionLocal
+from .models import Alert, AlertRule, DeviceOutlet, Sensor
+
+logger = logging.getLogger(__name__)
+
+ALERTS_ENABLED = os.getenv("ALERTS_ENABLED", "").lower() in ("1", "true", "yes")
+ALERT_RULES_REFRESH_SECONDS = float(os.getenv("ALERT_RULES_REFRESH_SECONDS", "60"))
+
+# Only devices.id is needed, to drop outlets whose device no longer exists.
+devices = table("devices", column("id"))
+
+OPEN_STATUS = "open"
+RESOLVED_STATUS = "resolved"
+
+COMPARATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "eq": operator.eq,
+    "ne": operator.ne,
+}
+
+
+def _naive_utc(ts: datetime) -> datetime:
+    if ts.tzinfo is None:
+        return ts
+    return ts.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class CompiledRule:
+    __slots__ = (
+        "rule_id", "outlet_id", "device_id", "sensor_type", "severity", "comparator", "compare", "threshold", "duration",
+    )
+
+    def __init__(self, rule: AlertRule, outlet_id: int, device_id: UUID):
+        self.rule_id = rule.rule_id
+        self.outlet_id = outlet_id
+        self.device_id = device_id
+        self.sensor_type = getattr(rule.sensor_type, "value", rule.sensor_type)
+        self.severity = rule.severity
+        self.comparator = rule.comparator.strip().lower()
+        self.compare = COMPARATORS[self.comparator]
+        self.threshold = float(rule.threshold_value)
+        self.duration = float(rule.duration_seconds or 0)
+
+
+def compile_rules(rows) -> dict[tuple[UUID, str], list[CompiledRule]]:
+    """Build the (device_id, sensor_type) -> rules index from (AlertRule, outlet_id, device_id) rows."""
+    index: dict[tuple[UUID, str], list[CompiledRule]] = {}
+    for rule, outlet_id, device_id in rows:
+        if rule.comparator.strip().lower() not in COMPARATORS:
+            logger.warning("Skipping alert rule %s with unknown comparator %r", rule.rule_id, rule.comparator)
+            continue
+        compiled = CompiledRule(rule, outlet_id, device_id)
+        index.setdefault((device_id, compiled.sensor_type), []).append(compiled)
+    return index
+
+
+class AlertEngine:
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._index: dict[tuple[UUID, str], list[CompiledRule]] = {}
+        # (device_id, rule_id) -> [breach_started_at, firing]; only breaching keys are kept.
+        self._state: dict[tuple[UUID, int], list] = {}
+        self._transitions: queue.SimpleQueue = queue.SimpleQueue()
+        self._open_alert_ids: dict[tuple[UUID, int], int] = {}
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.evaluated = 0
+        self.opened = 0
+        self.closed = 0
+
+    def evaluate(self, device_id: UUID, sensor_type: str, value: float, ts: datetime) -> None:
+        """Run one reading through its device's rules for its sensor type. Cheap; called inline on ingest."""
+        rules = self._index.get((device_id, sensor_type))
+        if not rules:
+            return
+        transitions = []
+        with self._lock:
+            self.evaluated += 1
+            for rule in rules:
+                key = (device_id, rule.rule_id)
+                state = self._state.get(key)
+                if rule.compare(value, rule.threshold):
+                    if state is None:
+                        state = self._state[key] = [ts, False]
+                    if not state[1] and (ts - state[0]).total_seconds() >= rule.duration:
+                        state[1] = True
+                        transitions.append(("open", key, rule, state[0], value))
+                elif state is not None:
+                    del self._state[key]
+                    if state[1]:
+                        transitions.append(("close", key, rule, ts, value))
+        for transition in transitions:
+            self._transitions.put(transition)
+
+    def load_rules(self) -> None:
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(AlertRule, Sensor.outlet_id, DeviceOutlet.device_id)
+                .join(Sensor, AlertRule.sensor_id == Sensor.sensor_id)
+                # Compared as text: sensors.outlet_id is typed as the legacy integer key in the model.
+                .join(DeviceOutlet, cast(Sensor.outlet_id, Text) == cast(DeviceOutlet.id, Text))
+                .join(devices, devices.c.id == DeviceOutlet.device_id)
+                .where(AlertRule.enabled.is_(True))
+            ).all()
+        finally:
+            db.close()
+        index = compile_rules(rows)
+        live = {rule.rule_id: rule for rules in index.values() for rule in rules}
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            self._index = index
+            stale = [k for k in self._state if k[1] not in live or live[k[1]].device_id != k[0]]
+            for key in stale:
+                started_at, firing = self._state.pop(key)
+                if firing:
+                    self._transitions.put(("close", key, None, now, None))
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="alert-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        self._transitions.put(None)
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        next_reload = 0.0
+        while not self._stopping.is_set():
+            now = datetime.now(timezone.utc).timestamp()
+            if now >= next_reload:
+                try:
+                    self.load_rules()
+                except Exception:
+                    logger.exception("Failed to load alert rules")
+                next_reload = now + self.refresh_seconds
+            try:
+                transition = self._transitions.get(timeout=max(0.0, next_reload - now))
+            except queue.Empty:
+                continue
+            if transition is None:
+                continue
+            try:
+                self._write(transition)
+            except Exception:
+                logger.exception("Failed to persist alert transition %s", transition[:2])
+
+    def _write(self, transition) -> None:
+        kind, key, rule, ts, value = transition
+        db = SessionLocal()
+        try:
+            if kind == "open":
+                alert = Alert(
+                    outlet_id=rule.outlet_id,
+                    rule_id=rule.rule_id,
+                    severity=rule.severity,
+                    start_ts=_naive_utc(ts),
+                    status=OPEN_STATUS,
+                    message=(
+                        f"{rule.sensor_type} {value} {rule.comparator} {rule.threshold:g} "
+                        f"on device {key[0]}"
+                    ),
+                )
+                db.add(alert)
+                db.commit()
+                self._open_alert_ids[key] = alert.alert_id
+                self.opened += 1
+            else:
+                alert_id = self._open_alert_ids.pop(key, None)
+                if alert_id is None:
+                    return
+                db.execute(
+                    update(Alert)
+                    .where(Alert.alert_id == alert_id)
+                    .values(end_ts=_naive_utc(ts), status=RESOLVED_STATUS)
+                )
+                db.commit()
+                self.closed += 1
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "rules": sum(len(r) for r in self._index.values()),
+                "devices": len({device_id for device_id, _ in self._index}),
+                "sensor_types": sorted({sensor_type for _, sensor_type in self._index}),
+                "breaching": len(self._state),
+                "firing": sum(1 for s in self._state.values() if s[1]),
+                "evaluated_total": self.evaluated,
+                "opened_total": self.opened,
+                "closed_total": self.closed,
+                "pending_writes": self._transitions.qsize(),
+            }
+
+
+engine = AlertEngine(ALERT_RULES_REFRESH_SECONDS)
@@ -0,0 +1,133 @@
+"""
+Vectorized backtesting of alert thresholds over historical sensor readings.
+
+`load_history` pulls (epoch seconds, value) pairs for one device and sensor type
+into NumPy arrays through a server-side cursor, LOAD_CHUNK_ROWS at a time.
+`evaluate_rule` replays the alert state machine of app/alerts.py with run-length
+logic over the whole array: each run of consecutive breaching readings fires
+one alert if it lasts at least duration_seconds.
+"""
+import os
+from datetime import datetime, timezone
+from typing import Any, Optional
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import Float, cast, func, select
+from sqlalchemy.orm import Session
+
+from .alerts import COMPARATORS
+from .database import SessionLocal
+from .models import SensorReading, SensorType
+
+LOAD_CHUNK_ROWS = int(os.getenv("BACKTEST_CHUNK_ROWS", "100000"))
+
+
+def load_history(
+    db: Session,
+    device_id: UUID,
+    sensor_type: SensorType,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return (timestamps as epoch seconds, values) ordered by time, both float64."""
+    r = SensorReading
+    stmt = (
+        select(cast(func.extract("epoch", r.created_at), Float), cast(r.value, Float))
+        .where(r.device_id == device_id, r.sensor_type == sensor_type)
+        .order_by(r.created_at)
+    )
+    if start is not None:
+        stmt = stmt.where(r.created_at >= start)
+    if end is not None:
+        stmt = stmt.where(r.created_at < end)
+
+    chunks = [
+        np.array(partition, dtype=np.float64).reshape(-1, 2)
+        for partition in db.execute(stmt, execution_options={"yield_per": LOAD_CHUNK_ROWS}).partitions()
+    ]
+    if not chunks:
+        return np.empty(0), np.empty(0)
+    data = np.concatenate(chunks)
+    return data[:, 0], data[:, 1]
+
+
+def _iso(epoch_seconds: float) -> str:
+    return datetime.fromtimestamp(float(epoch_seconds), tz=timezone.utc).isoformat()
+
+
+def evaluate_rule(
+    ts: np.ndarray,
+    values: np.ndarray,
+    comparator: str,
+    threshold: float,
+    duration_seconds: float = 0,
+) -> dict[str, Any]:
+    """Count the alerts a rule would have fired over time-ordered readings."""
+    comparator = comparator.strip().lower()
+    breach = COMPARATORS[comparator](values, threshold)
+    result = {
+        "comparator": comparator,
+        "threshold_value": threshold,
+        "duration_seconds": duration_seconds,
+        "readings": int(ts.size),
+        "breaching_readings": int(np.count_nonzero(breach)),
+        "breach_runs": 0,
+        "alerts_fired": 0,
+        "time_in_alert_seconds": 0.0,
+        "first_fired_at": None,
+        "last_fired_at": None,
+    }
+    if not result["breaching_readings"]:
+        return result
+
+    edges = np.diff(np.concatenate(([0], breach.view(np.int8), [0])))
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1) - 1  # inclusive
+
+    # An alert opens at the first reading of the run at least duration_seconds after its start.
+    fire_at = np.searchsorted(ts, ts[run_starts] + duration_seconds, side="left")
+    fired = fire_at <= run_ends
+    fire_at = fire_at[fired]
+    # ...and closes at the first non-breaching reading after the run (or the last reading).
+    close_at = np.minimum(run_ends[fired] + 1, ts.size - 1)
+
+    result["breach_runs"] = int(run_starts.size)
+    result["alerts_fired"] = int(fire_at.size)
+    if fire_at.size:
+        result["time_in_alert_seconds"] = float(np.sum(ts[close_at] - ts[fire_at]))
+        result["first_fired_at"] = _iso(ts[fire_at[0]])
+        result["last_fired_at"] = _iso(ts[fire_at[-1]])
+    return result
+
+
+def run_backtest(
+    device_id: UUID,
+    sensor_type: SensorType,
+    rules: list[dict[str, Any]],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> dict[str, Any]:
+    """Load a device's history once and evaluate every candidate rule against it."""
+    db = SessionLocal()
+    try:
+        ts, values = load_history(db, device_id, sensor_type, start, end)
+    finally:
+        db.close()
+    return {
+        "device_id": str(device_id),
+        "sensor_type": sensor_type.value,
+        "readings": int(ts.size),
+        "from": _iso(ts[0]) if ts.size else None,
+        "to": _iso(ts[-1]) if ts.size else None,
+        "rules": [
+            evaluate_rule(
+                ts,
+                values,
+                rule["comparator"],
+                float(rule["threshold_value"]),
+                float(rule.get("duration_seconds") or 0),
+            )
+            for rule in rules
+        ],
+    }
@@ -0,0 +1,103 @@
+"""
+Small thread-safe LRU cache with optional per-entry TTL, shared by the
+process-local caches (latest readings, workspace roles, ...).
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+# Returned by get() when a key is absent or expired, so None can be cached.
+MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, max_entries: int, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: OrderedDict[Hashable, tuple[Optional[float], Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expiry(self, ttl_seconds: Optional[float]) -> Optional[float]:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        return time.monotonic() + ttl if ttl else None
+
+    def _live(self, key: Hashable) -> Any:
+        """Return the live value for key or MISSING. Caller holds the lock."""
+        entry = self._data.get(key)
+        if entry is None:
+            return MISSING
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return MISSING
+        return value
+
+    def _store(self, key: Hashable, value: Any, ttl_seconds: Optional[float]) -> None:
+        self._data[key] = (self._expiry(ttl_seconds), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        with self._lock:
+            value = self._live(key)
+            if value is MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        with self._lock:
+            self._store(key, value, ttl_seconds)
+
+    def update(self, key: Hashable, fn: Callable[[Any], Any], ttl_seconds: Optional[float] = None) -> Any:
+        """
+        Atomically replace the value for key with fn(current), where current is
+        MISSING if absent. Returning MISSING from fn leaves the entry unchanged.
+        """
+        with self._lock:
+            current = self._live(key)
+            value = fn(current)
+            if value is not MISSING:
+                self._store(key, value, ttl_seconds)
+            return value
+
+    def pop(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return MISSING if entry is None else entry[1]
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every key matching predicate. O(n); meant for rare invalidations."""
+        with self._lock:
+            keys = [k for k in self._data if predicate(k)]
+            for k in keys:
+                del self._data[k]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
@@ -1,20 +1,98 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 import os
+import uuid
+
+from .pool_stats import PoolStats, attach_listeners, instrumented_pool_class
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 if not SQLALCHEMY_DATABASE_URL:
     raise RuntimeError("DATABASE_URL environment variable is not set")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Pool settings apply per engine and per worker process (sync and async engines each get one pool).
+POOL_SETTINGS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+}
+# Transaction-mode poolers (Supabase port 6543 / pgbouncer) can't keep prepared statements or LISTEN.
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "").lower() in ("1", "true", "yes")
+# 0 leaves the server default in place.
+STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+sync_pool_stats = PoolStats("sync")
+async_pool_stats = PoolStats("async")
+
+_sync_connect_args: dict = {}
+if STATEMENT_TIMEOUT_MS:
+    _sync_connect_args["options"] = f"-c statement_timeout={STATEMENT_TIMEOUT_MS}"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    poolclass=instrumented_pool_class(QueuePool, sync_pool_stats),
+    connect_args=_sync_connect_args,
+    **POOL_SETTINGS,
+)
+attach_listeners(engine, sync_pool_stats)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def _async_engine_args(url: str) -> tuple[str, dict]:
+    """
+    Derive the asyncpg URL and connect args from DATABASE_URL.
+    asyncpg does not understand libpq's sslmode, so it is translated to `ssl`.
+    """
+    parsed = make_url(url)
+    query = dict(parsed.query)
+    connect_args: dict = {}
+    sslmode = query.pop("sslmode", None)
+    if sslmode == "disable":
+        connect_args["ssl"] = False
+    elif sslmode:
+        connect_args["ssl"] = sslmode if sslmode in ("require", "verify-ca", "verify-full") else "prefer"
+    if DB_PGBOUNCER:
+        query["prepared_statement_cache_size"] = "0"
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+    if STATEMENT_TIMEOUT_MS:
+        connect_args["server_settings"] = {"statement_timeout": str(STATEMENT_TIMEOUT_MS)}
+    return parsed.set(drivername="postgresql+asyncpg", query=query).render_as_string(hide_password=False), connect_args
+
+
+_async_url, _async_connect_args = _async_engine_args(SQLALCHEMY_DATABASE_URL)
+async_engine = create_async_engine(
+    _async_url,
+    poolclass=instrumented_pool_class(AsyncAdaptedQueuePool, async_pool_stats),
+    connect_args=_async_connect_args,
+    **POOL_SETTINGS,
+)
+attach_listeners(async_engine.sync_engine, async_pool_stats)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def asyncpg_connect_kwargs() -> dict:
+    """Arguments for a standalone asyncpg.connect(), e.g. a LISTEN connection kept outside the pool."""
+    dsn = make_url(_async_url).set(drivername="postgresql", query={}).render_as_string(hide_password=False)
+    kwargs = {"dsn": dsn}
+    kwargs.update({k: v for k, v in _async_connect_args.items() if k in ("ssl", "server_settings")})
+    return kwargs
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,248 @@
+"""
+Idempotent sensor ingest.
+
+A reading may carry a device sequence number (`seq`); (device_id, sensor_type, seq)
+then identifies it across firmware retries, and a replay gets the originally
+stored reading back instead of a second row.
+
+Recently seen keys are remembered in a bounded in-memory LRU so most replays
+never reach the database. The sensor_reading_dedup table, keyed by the same
+triple, is the fallback: keys are claimed with INSERT ... ON CONFLICT DO NOTHING
+in the same transaction as the readings, so a key is stored once even across
+workers and restarts. Keys older than DEDUP_KEY_RETENTION_HOURS are deleted by
+a background job every DEDUP_EXPIRY_INTERVAL_SECONDS (0 disables it); seq must
+not repeat for a device within that window.
+
+The table is created by scripts/migrate_dedup_keys.py, which has to run before
+devices send seq; until then the expiry job skips its runs.
+"""
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Hashable, Iterable, Optional
+
+from sqlalchemy import and_, delete, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .cache import LRUCache, MISSING
+from .database import SessionLocal
+from .models import SensorReading, SensorReadingDedup
+
+logger = logging.getLogger(__name__)
+
+DEDUP_KEY_RETENTION_HOURS = float(os.getenv("DEDUP_KEY_RETENTION_HOURS", "48"))
+DEDUP_EXPIRY_INTERVAL_SECONDS = float(os.getenv("DEDUP_EXPIRY_INTERVAL_SECONDS", "3600"))
+DEDUP_EXPIRY_ENABLED = DEDUP_EXPIRY_INTERVAL_SECONDS > 0
+
+_seen = LRUCache(
+    max_entries=int(os.getenv("DEDUP_CACHE_MAX_ENTRIES", "100000")),
+    ttl_seconds=float(os.getenv("DEDUP_CACHE_TTL_SECONDS", "3600")) or None,
+)
+
+
+def key(row: dict[str, Any]) -> tuple[Hashable, str, int]:
+    sensor_type = row["sensor_type"]
+    return (row["device_id"], getattr(sensor_type, "value", sensor_type), row["seq"])
+
+
+def is_keyed(row: dict[str, Any]) -> bool:
+    return row.get("seq") is not None
+
+
+def split(rows: list[dict[str, Any]]) -> tuple[list[dict[str, Any]], dict[tuple, dict[str, Any]]]:
+    """
+    Separate rows to write from replays answered by the in-memory cache.
+    Repeats of a key within `rows` are written once. Returns (fresh, {key: reading}).
+    """
+    fresh = []
+    replays = {}
+    pending = set()
+    for row in rows:
+        if not is_keyed(row):
+            fresh.append(row)
+            continue
+        k = key(row)
+        if k in pending or k in replays:
+            continue
+        reading = _seen.get(k)
+        if reading is MISSING:
+            pending.add(k)
+            fresh.append(row)
+        else:
+            replays[k] = reading
+    return fresh, replays
+
+
+def remember(k: tuple, reading: dict[str, Any]) -> None:
+    _seen.set(k, reading)
+
+
+def forget(rows: Iterable[dict[str, Any]]) -> None:
+    """Drop remembered keys of rows that were accepted but never stored, so a retry is written."""
+    for row in rows:
+        if is_keyed(row):
+            _seen.pop(key(row))
+
+
+def _claim_stmt(keyed: list[dict[str, Any]]):
+    return (
+        pg_insert(SensorReadingDedup)
+        .values(
+            [
+                {
+                    "device_id": row["device_id"],
+                    "sensor_type": row["sensor_type"],
+                    "seq": row["seq"],
+                    "reading_id": row["id"],
+                    "created_at": row["created_at"],
+                }
+                for row in keyed
+            ]
+        )
+        .on_conflict_do_nothing()
+        .returning(SensorReadingDedup.device_id, SensorReadingDedup.sensor_type, SensorReadingDedup.seq)
+    )
+
+
+def _claimed_rows(rows: list[dict[str, Any]], claimed: Iterable[Any]) -> tuple[list[dict[str, Any]], list[tuple]]:
+    won = {(r.device_id, r.sensor_type.value, r.seq) for r in claimed}
+    to_insert = []
+    duplicates = []
+    for row in rows:
+        if not is_keyed(row) or key(row) in won:
+            to_insert.append(row)
+        else:
+            duplicates.append(key(row))
+    return to_insert, duplicates
+
+
+def claim(db: Session, rows: list[dict[str, Any]]) -> tuple[list[dict[str, Any]], list[tuple]]:
+    """
+    Claim the idempotency keys of rows in the caller's transaction.
+    Returns (rows to insert, keys already stored by an earlier request).
+    """
+    keyed = [row for row in rows if is_keyed(row)]
+    if not keyed:
+        return rows, []
+    return _claimed_rows(rows, db.execute(_claim_stmt(keyed)).all())
+
+
+async def claim_async(db: AsyncSession, rows: list[dict[str, Any]]) -> tuple[list[dict[str, Any]], list[tuple]]:
+    """Async twin of claim for request handlers."""
+    keyed = [row for row in rows if is_keyed(row)]
+    if not keyed:
+        return rows, []
+    return _claimed_rows(rows, (await db.execute(_claim_stmt(keyed))).all())
+
+
+async def originals_async(db: AsyncSession, keys: list[tuple]) -> dict[tuple, dict[str, Any]]:
+    """
+    Load what was stored under keys as {key: {id, value, unit, raw, created_at}}.
+    value/unit/raw are None when the reading itself is already gone (retention).
+    """
+    if not keys:
+        return {}
+    stmt = (
+        select(
+            SensorReadingDedup.device_id,
+            SensorReadingDedup.sensor_type,
+            SensorReadingDedup.seq,
+            SensorReadingDedup.reading_id,
+            SensorReadingDedup.created_at,
+            SensorReading.value,
+            SensorReading.unit,
+            SensorReading.raw,
+        )
+        .outerjoin(
+            SensorReading,
+            and_(
+                SensorReading.id == SensorReadingDedup.reading_id,
+                SensorReading.created_at == SensorReadingDedup.created_at,
+            ),
+        )
+        .where(tuple_(SensorReadingDedup.device_id, SensorReadingDedup.sensor_type, SensorReadingDedup.seq).in_(keys))
+    )
+    result = await db.execute(stmt)
+    return {
+        (row.device_id, row.sensor_type.value, row.seq): {
+            "id": row.reading_id,
+            "value": row.value,
+            "unit": row.unit,
+            "raw": row.raw,
+            "created_at": row.created_at,
+        }
+        for row in result.all()
+    }
+
+
+def expire_keys(db: Session, now: datetime) -> None:
+    """Delete keys whose reading is older than DEDUP_KEY_RETENTION_HOURS. Caller commits."""
+    db.execute(
+        delete(SensorReadingDedup).where(
+            SensorReadingDedup.created_at < now - timedelta(hours=DEDUP_KEY_RETENTION_HOURS)
+        )
+    )
+
+
+def table_exists(db: Session) -> bool:
+    return db.execute(
+        text("SELECT to_regclass(:table)"), {"table": SensorReadingDedup.__tablename__}
+    ).scalar() is not None
+
+
+def run_expiry(now: Optional[datetime] = None) -> bool:
+    """Expire old keys. Returns False, without doing anything, if the dedup table does not exist."""
+    now = now or datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        if not table_exists(db):
+            return False
+        expire_keys(db, now)
+        db.commit()
+    except Exception:
+        logger.exception("Ingest idempotency key expiry failed")
+        db.rollback()
+    finally:
+        db.close()
+    return True
+
+
+class KeyExpiryJob:
+    def __init__(self, interval_seconds: float):
+        self.interval = interval_seconds
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="dedup-key-expiry", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        warned = False
+        while not self._stopping.is_set():
+            if not run_expiry() and not warned:
+                logger.warning(
+                    "%s does not exist; skipping key expiry until scripts/migrate_dedup_keys.py has run",
+                    SensorReadingDedup.__tablename__,
+                )
+                warned = True
+            self._stopping.wait(self.interval)
+
+
+job = KeyExpiryJob(DEDUP_EXPIRY_INTERVAL_SECONDS)
+
+
+def stats() -> dict[str, Any]:
+    return _seen.stats()
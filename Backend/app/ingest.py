@@ -0,0 +1,241 @@
+"""
+Write path helpers for sensor_readings.
+
+`insert_readings` writes prepared rows with one multi-row INSERT.
+`WriteBehindBuffer` is the optional group-commit mode for POST /sensor-readings:
+readings are queued in memory and a background thread flushes them in bulk
+every SENSOR_INGEST_FLUSH_MS milliseconds or SENSOR_INGEST_FLUSH_ROWS rows.
+Enable it with SENSOR_INGEST_MODE=buffered. A failed batch is retried on the
+next flush, up to SENSOR_INGEST_MAX_ATTEMPTS times in all, before it is dropped.
+
+Rows may carry an idempotency `seq` (see app/dedup.py); it is not a
+sensor_readings column and is dropped before the INSERT.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import dedup, rollups
+from .database import SessionLocal
+from .models import SensorReading
+
+logger = logging.getLogger(__name__)
+
+INGEST_MODE = os.getenv("SENSOR_INGEST_MODE", "direct").lower()
+BUFFERED_INGEST = INGEST_MODE == "buffered"
+MAX_FLUSH_ATTEMPTS = int(os.getenv("SENSOR_INGEST_MAX_ATTEMPTS", "3"))
+
+
+def _columns(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return [{k: v for k, v in row.items() if k != "seq"} if "seq" in row else row for row in rows]
+
+
+def insert_readings(db: Session, rows: list[dict[str, Any]]) -> None:
+    """Insert prepared sensor_readings rows (ids and created_at already set). Caller commits."""
+    if rows:
+        db.execute(insert(SensorReading), _columns(rows))
+
+
+async def insert_readings_async(db: AsyncSession, rows: list[dict[str, Any]]) -> None:
+    """Async twin of insert_readings for request handlers. Caller commits."""
+    if rows:
+        await db.execute(insert(SensorReading), _columns(rows))
+
+
+class WriteBehindBuffer:
+    """
+    Bounded in-process queue of sensor_readings rows flushed by a background thread.
+
+    `offer` never blocks: it returns False when the buffer is full so the caller
+    can apply backpressure. A batch whose flush fails is kept (counting against
+    capacity) and retried first on the next flush; after max_attempts failures
+    it is dropped, counted, and its dedup keys are forgotten so device retries
+    are written. `on_written` is called from the flusher thread with the rows of
+    each committed batch, so consumers only see readings that were stored.
+    """
+
+    def __init__(self, capacity: int, flush_rows: int, flush_interval_ms: int, max_attempts: int = MAX_FLUSH_ATTEMPTS):
+        self.capacity = capacity
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_attempts = max(1, max_attempts)
+        self.on_written: Optional[Callable[[list[dict[str, Any]]], None]] = None
+        self._rows: deque[dict[str, Any]] = deque()
+        # (batch, failed attempts) waiting to be retried.
+        self._retry: deque[tuple[list[dict[str, Any]], int]] = deque()
+        self._retry_rows = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._enqueued = 0
+        self._rejected = 0
+        self._flushes = 0
+        self._flushed_rows = 0
+        self._failed_flushes = 0
+        self._retried_rows = 0
+        self._dropped_rows = 0
+        self._last_flush_rows = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def offer(self, row: dict[str, Any]) -> bool:
+        return self.offer_many([row])
+
+    def offer_many(self, rows: list[dict[str, Any]]) -> bool:
+        """Queue all rows or none of them. Returns False when there is not enough room."""
+        with self._lock:
+            if len(self._rows) + self._retry_rows + len(rows) > self.capacity:
+                self._rejected += len(rows)
+                return False
+            self._rows.extend(rows)
+            self._enqueued += len(rows)
+            depth = len(self._rows)
+        if depth >= self.flush_rows:
+            self._wakeup.set()
+        return True
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="sensor-ingest-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the flusher thread and drain whatever is still queued; rows that still fail are dropped."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+        with self._lock:
+            left = [row for batch, _ in self._retry for row in batch] + list(self._rows)
+            self._retry.clear()
+            self._retry_rows = 0
+            self._rows.clear()
+        if left:
+            self._drop(left, "at shutdown")
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Sensor ingest flusher iteration failed")
+
+    def flush(self) -> int:
+        """
+        Write everything currently queued, pending retries first, in chunks of
+        flush_rows. Stops at the first failed batch. Returns rows written.
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    if self._retry:
+                        batch, attempts = self._retry.popleft()
+                        self._retry_rows -= len(batch)
+                    elif self._rows:
+                        count = min(self.flush_rows, len(self._rows))
+                        batch = [self._rows.popleft() for _ in range(count)]
+                        attempts = 0
+                    else:
+                        break
+                if self._write(batch):
+                    written += len(batch)
+                    continue
+                attempts += 1
+                if attempts >= self.max_attempts:
+                    self._drop(batch, f"after {attempts} failed flushes")
+                    continue
+                with self._lock:
+                    self._retry.appendleft((batch, attempts))
+                    self._retry_rows += len(batch)
+                    self._retried_rows += len(batch)
+                # Likely a database outage: wait for the next flush instead of spinning.
+                break
+        return written
+
+    def _drop(self, rows: list[dict[str, Any]], reason: str) -> None:
+        logger.error("Dropping %d buffered sensor readings %s", len(rows), reason)
+        dedup.forget(rows)
+        with self._lock:
+            self._dropped_rows += len(rows)
+
+    def _write(self, batch: list[dict[str, Any]]) -> bool:
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            # Keys already stored (e.g. by another worker) are dropped here.
+            rows, _ = dedup.claim(db, batch)
+            insert_readings(db, rows)
+            db.commit()
+            ok = True
+        except Exception:
+            logger.exception("Failed to flush %d buffered sensor readings", len(batch))
+            db.rollback()
+            ok = False
+        finally:
+            db.close()
+
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        with self._lock:
+            self._flushes += 1
+            self._last_flush_rows = len(batch)
+            self._last_flush_ms = elapsed_ms
+            self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+            self._total_flush_ms += elapsed_ms
+            if ok:
+                self._flushed_rows += len(batch)
+            else:
+                self._failed_flushes += 1
+        if ok:
+            rollups.mark_written(rows)
+            if self.on_written is not None:
+                try:
+                    self.on_written(rows)
+                except Exception:
+                    logger.exception("Post-flush hook failed for %d sensor readings", len(rows))
+        return ok
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "queue_depth": len(self._rows) + self._retry_rows,
+                "retry_depth": self._retry_rows,
+                "capacity": self.capacity,
+                "flush_rows": self.flush_rows,
+                "flush_interval_ms": int(self.flush_interval * 1000),
+                "enqueued_total": self._enqueued,
+                "rejected_total": self._rejected,
+                "flushes_total": self._flushes,
+                "flushed_rows_total": self._flushed_rows,
+                "failed_flushes_total": self._failed_flushes,
+                "retried_rows_total": self._retried_rows,
+                "dropped_rows_total": self._dropped_rows,
+                "last_flush_rows": self._last_flush_rows,
+                "last_flush_ms": round(self._last_flush_ms, 3),
+                "max_flush_ms": round(self._max_flush_ms, 3),
+                "avg_flush_ms": round(self._total_flush_ms / self._flushes, 3) if self._flushes else 0.0,
+            }
+
+
+buffer = WriteBehindBuffer(
+    capacity=int(os.getenv("SENSOR_INGEST_BUFFER_CAPACITY", "10000")),
+    flush_rows=int(os.getenv("SENSOR_INGEST_FLUSH_ROWS", "500")),
+    flush_interval_ms=int(os.getenv("SENSOR_INGEST_FLUSH_MS", "200")),
+)
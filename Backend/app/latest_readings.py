@@ -0,0 +1,152 @@
+"""
+Process-local "last value" table for sensor readings, keyed by (device_id, sensor_type).
+
+GET /sensor-readings/latest is answered from memory, falling back to the
+database only on a miss, which `warm`s the key. Ingest `record`s what it wrote
+into keys already warmed, when it is newer than the cached reading; a key not
+cached yet is left for the next lookup to warm, since the ingested row (e.g. a
+backfilled, device-timestamped one) may be older than what the database holds.
+A cached None means "no readings yet" and is replaced by the first write.
+
+`lookup_many` answers a whole set of keys at once (e.g. a workspace dashboard),
+fetching every miss in one LATERAL query over unnest()ed key arrays that uses the
+(device_id, sensor_type, created_at DESC) index once per key.
+
+The table is per process, so entries expire after LATEST_CACHE_MAX_AGE_SECONDS
+(default 5) and readings written by other workers are picked up from the
+database within that window. Set it to 0 to keep entries until evicted, e.g.
+with a single worker.
+"""
+import os
+from datetime import datetime
+from typing import Any, Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import Text, cast, func, select, true
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .cache import LRUCache, MISSING
+from .models import SensorReading, SensorType
+
+_max_age = float(os.getenv("LATEST_CACHE_MAX_AGE_SECONDS", "5"))
+
+cache = LRUCache(
+    max_entries=int(os.getenv("LATEST_CACHE_MAX_ENTRIES", "50000")),
+    ttl_seconds=_max_age or None,
+)
+
+
+def _key(device_id: UUID, sensor_type: str) -> tuple[UUID, str]:
+    return (device_id, sensor_type)
+
+
+def lookup(device_id: UUID, sensor_type: str) -> Any:
+    """Return the cached reading dict, None for "known empty", or MISSING."""
+    entry = cache.get(_key(device_id, sensor_type))
+    if entry is MISSING:
+        return MISSING
+    return entry[1]
+
+
+def _newer(created_at: Optional[datetime], reading: Optional[dict], fill_missing: bool):
+    def update(current: Any) -> Any:
+        if current is MISSING:
+            return (created_at, reading) if fill_missing else MISSING
+        if current[1] is None:
+            return (created_at, reading)
+        if reading is None:
+            return MISSING
+        current_at = current[0]
+        if current_at is not None and created_at is not None and created_at < current_at:
+            return MISSING
+        return (created_at, reading)
+
+    return update
+
+
+def record(device_id: UUID, sensor_type: str, created_at: Optional[datetime], reading: dict) -> None:
+    """Ingest: replace the cached reading if reading is newer. Keys not cached yet are left alone."""
+    cache.update(_key(device_id, sensor_type), _newer(created_at, reading, fill_missing=False))
+
+
+def warm(device_id: UUID, sensor_type: str, created_at: Optional[datetime], reading: Optional[dict]) -> None:
+    """
+    Cache the latest row read from the database (None if there is none) unless
+    a newer one was recorded meanwhile.
+    """
+    cache.update(_key(device_id, sensor_type), _newer(created_at, reading, fill_missing=True))
+
+
+def reading_from_row(row: Any) -> dict[str, Any]:
+    """Serialize a sensor_readings row the way ingest records it."""
+    sensor_type = row.sensor_type
+    return {
+        "id": str(row.id),
+        "device_id": str(row.device_id),
+        "sensor_type": getattr(sensor_type, "value", sensor_type),
+        "value": float(row.value),
+        "unit": row.unit,
+        "raw": row.raw,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+    }
+
+
+async def lookup_many(
+    db: AsyncSession, keys: Iterable[tuple[UUID, str]]
+) -> dict[tuple[UUID, str], Optional[dict[str, Any]]]:
+    """
+    Return {(device_id, sensor_type): reading or None} for every key, reading
+    cached entries from memory and all misses with one query, then caching them.
+    """
+    found: dict[tuple[UUID, str], Optional[dict[str, Any]]] = {}
+    misses = []
+    for key in keys:
+        cached = lookup(*key)
+        if cached is MISSING:
+            misses.append(key)
+        else:
+            found[key] = cached
+    if not misses:
+        return found
+
+    # Two array parameters however many keys there are (asyncpg allows 32767 binds).
+    # Enum(SensorType) stores member names, so that is what the text array carries.
+    sensor_type_type = SensorReading.__table__.c.sensor_type.type
+    wanted = (
+        func.unnest(
+            cast([device_id for device_id, _ in misses], ARRAY(PG_UUID(as_uuid=True))),
+            cast([SensorType(sensor_type).name for _, sensor_type in misses], ARRAY(Text)),
+        )
+        .table_valued("device_id", "sensor_type")
+        .render_derived(name="wanted")
+    )
+    latest = (
+        select(SensorReading)
+        .where(
+            SensorReading.device_id == wanted.c.device_id,
+            SensorReading.sensor_type == cast(wanted.c.sensor_type, sensor_type_type),
+        )
+        .order_by(SensorReading.created_at.desc())
+        .limit(1)
+        .lateral("latest")
+    )
+    result = await db.execute(select(latest).select_from(wanted).join(latest, true()))
+    rows = {}
+    for row in result.all():
+        rows[(row.device_id, getattr(row.sensor_type, "value", row.sensor_type))] = row
+
+    for key in misses:
+        row = rows.get(key)
+        if row is None:
+            warm(key[0], key[1], None, None)
+            found[key] = None
+        else:
+            reading = reading_from_row(row)
+            warm(key[0], key[1], row.created_at, reading)
+            found[key] = reading
+    return found
+
+
+def stats() -> dict[str, Any]:
+    return cache.stats()
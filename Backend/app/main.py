@@ -1,4 +1,6 @@
+from contextlib import asynccontextmanager
 from pathlib import Path
+import asyncio
 import os
 from dotenv import load_dotenv
 load_dotenv(Path(__file__).resolve().parent.parent / ".env")
@@ -6,8 +8,8 @@ load_dotenv(Path(__file__).resolve().parent.parent / ".env")
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from . import models 
-from .database import engine
+from . import alerts, dedup, ingest, metrics, models, outlet_revisions, partitions, presence, rollups, supabase_admin
+from .database import async_engine, engine
 from .routers import (
     null_router,
     sensor_log_router,
@@ -16,9 +18,48 @@ from .routers import (
     devices_router,
     profiles_router,
     device_outlets_router,
+    internal_router,
+    metrics_router,
 )
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await supabase_admin.start()
+    await outlet_revisions.tracker.start()
+    # Background workers live for the lifetime of the process.
+    if ingest.BUFFERED_INGEST:
+        ingest.buffer.start()
+    if rollups.ROLLUPS_ENABLED:
+        rollups.job.start()
+    if alerts.ALERTS_ENABLED:
+        alerts.engine.start()
+    if partitions.PARTITION_MAINTENANCE_ENABLED:
+        partitions.job.start()
+    if presence.PRESENCE_ENABLED:
+        presence.tracker.start()
+    if dedup.DEDUP_EXPIRY_ENABLED:
+        dedup.job.start()
+    try:
+        yield
+    finally:
+        if dedup.DEDUP_EXPIRY_ENABLED:
+            await asyncio.to_thread(dedup.job.stop)
+        if presence.PRESENCE_ENABLED:
+            await asyncio.to_thread(presence.tracker.stop)
+        if partitions.PARTITION_MAINTENANCE_ENABLED:
+            await asyncio.to_thread(partitions.job.stop)
+        if alerts.ALERTS_ENABLED:
+            await asyncio.to_thread(alerts.engine.stop)
+        if rollups.ROLLUPS_ENABLED:
+            await asyncio.to_thread(rollups.job.stop)
+        if ingest.BUFFERED_INGEST:
+            await asyncio.to_thread(ingest.buffer.stop)
+        await outlet_revisions.tracker.stop()
+        await supabase_admin.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS
 # In dev we allow localhost / Expo dev tools. In prod, tighten this.
@@ -38,8 +79,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Outlets-Revision"],
 )
 
+# Per-route latency and DB query counts, served by GET /metrics.
+if metrics.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.instrument_engine(engine)
+    metrics.instrument_engine(async_engine.sync_engine)
+
 # Only run create_all when explicitly requested (e.g. local dev with empty DB).
 # On Render + Supabase, leave unset so we use your existing tables and never run create_all.
 if os.getenv("RUN_CREATE_TABLES", "").lower() in ("1", "true", "yes"):
@@ -52,3 +100,5 @@ app.include_router(workspaces_router.router)
 app.include_router(devices_router.router)
 app.include_router(profiles_router.router)
 app.include_router(device_outlets_router.router)
+app.include_router(internal_router.router)
+app.include_router(metrics_router.router)
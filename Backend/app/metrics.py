@@ -0,0 +1,239 @@
+"""
+Request and database metrics, rendered in Prometheus text format by GET /metrics.
+
+`MetricsMiddleware` (pure ASGI) times every HTTP request and records latency
+histograms and status-code counts per route template. While a request runs, a
+contextvar points at its `RequestStats`; `instrument_engine` hooks
+before/after_cursor_execute on an engine so every query's count and duration
+are attributed to the current request. That also works for sync work started
+from the request (run_in_threadpool copies the context). Queries issued outside
+any request, e.g. by background jobs, are counted under route="background".
+
+Metrics are per process. Disable with METRICS_ENABLED=0.
+"""
+import bisect
+import os
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() in ("1", "true", "yes")
+
+# Upper bounds of the histogram buckets; +Inf is implied.
+LATENCY_BUCKETS_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+BACKGROUND_ROUTE = "background"
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_metrics", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS_SECONDS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.db_seconds = 0.0
+        self.statuses: dict[int, int] = {}
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: dict[tuple[str, str], RouteMetrics] = {}
+        self._background_queries = 0
+        self._background_db_seconds = 0.0
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        with self._lock:
+            metrics = self._routes.get((method, route))
+            if metrics is None:
+                metrics = self._routes[(method, route)] = RouteMetrics()
+            metrics.latency.observe(seconds)
+            metrics.queries.observe(stats.queries)
+            metrics.db_seconds += stats.db_seconds
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+
+    def observe_background_query(self, seconds: float) -> None:
+        with self._lock:
+            self._background_queries += 1
+            self._background_db_seconds += seconds
+
+    def render(self) -> list[str]:
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route template.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            routes = sorted(self._routes.items())
+            for (method, route), m in routes:
+                lines.extend(_histogram("http_request_duration_seconds", {"method": method, "route": route}, m.latency))
+            lines += ["# HELP http_requests_total Requests by route template and status.", "# TYPE http_requests_total counter"]
+            for (method, route), m in routes:
+                for status, count in sorted(m.statuses.items()):
+                    lines.append(_sample("http_requests_total", {"method": method, "route": route, "status": str(status)}, count))
+            lines += [
+                "# HELP http_request_db_queries Database queries issued per request.",
+                "# TYPE http_request_db_queries histogram",
+            ]
+            for (method, route), m in routes:
+                lines.extend(_histogram("http_request_db_queries", {"method": method, "route": route}, m.queries))
+            lines += [
+                "# HELP db_query_seconds_total Time spent executing queries, by route template.",
+                "# TYPE db_query_seconds_total counter",
+            ]
+            for (method, route), m in routes:
+                lines.append(_sample("db_query_seconds_total", {"method": method, "route": route}, m.db_seconds))
+            lines.append(_sample("db_query_seconds_total", {"method": "", "route": BACKGROUND_ROUTE}, self._background_db_seconds))
+            lines += ["# HELP db_queries_total Queries executed, by route template.", "# TYPE db_queries_total counter"]
+            for (method, route), m in routes:
+                lines.append(_sample("db_queries_total", {"method": method, "route": route}, m.queries.sum))
+            lines.append(_sample("db_queries_total", {"method": "", "route": BACKGROUND_ROUTE}, self._background_queries))
+        return lines
+
+
+registry = Registry()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _sample(name: str, labels: dict[str, str], value: float) -> str:
+    if labels:
+        label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+        return f"{name}{{{label_text}}} {_number(value)}"
+    return f"{name} {_number(value)}"
+
+
+def _number(value: float) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _histogram(name: str, labels: dict[str, str], histogram: Histogram) -> list[str]:
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.buckets + (None,), histogram.counts):
+        cumulative += count
+        le = "+Inf" if bound is None else _number(bound)
+        lines.append(_sample(f"{name}_bucket", {**labels, "le": le}, cumulative))
+    lines.append(_sample(f"{name}_sum", labels, histogram.sum))
+    lines.append(_sample(f"{name}_count", labels, histogram.count))
+    return lines
+
+
+_NAME_RE = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def gauge_lines(prefix: str, stats: dict[str, Any], labels: Optional[dict[str, str]] = None) -> list[str]:
+    """Render the numeric values of a stats() dict as gauges named <prefix>_<key>."""
+    lines = []
+    for key, value in stats.items():
+        if isinstance(value, (int, float)):
+            lines.append(_sample(_NAME_RE.sub("_", f"{prefix}_{key}"), labels or {}, value))
+    return lines
+
+
+def _metric_name(line: str) -> str:
+    return re.split(r"[{ ]", line, maxsplit=1)[0]
+
+
+def render(gauges: Iterable[str] = ()) -> str:
+    """Request/DB metrics followed by gauges, grouped by metric name as the text format requires."""
+    return "\n".join([*registry.render(), *sorted(gauges, key=_metric_name)]) + "\n"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["metrics_query_start"].pop()
+    elapsed = time.perf_counter() - started
+    stats = _current.get()
+    if stats is None:
+        registry.observe_background_query(elapsed)
+    else:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+
+def _handle_error(context):
+    # A failed statement gets no after_cursor_execute; drop its start time.
+    conn = context.connection
+    if conn is not None and conn.info.get("metrics_query_start"):
+        conn.info["metrics_query_start"].pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attribute every query run on engine (pass async_engine.sync_engine for async) to the current request."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: no request/response wrapping, streaming bodies pass through untouched."""
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            registry.observe_request(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                status,
+                time.perf_counter() - started,
+                stats,
+            )
@@ -1,5 +1,5 @@
 from .database import Base
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Float, DateTime, Enum, Numeric, Text
+from sqlalchemy import BigInteger, Column, Integer, String, Boolean, ForeignKey, Float, DateTime, Enum, Index, Numeric, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID, JSONB
 from datetime import datetime
@@ -88,6 +88,53 @@ class SensorReading(Base):
     raw = Column(JSONB, nullable=True)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
 
+    __table_args__ = (
+        # Serves /latest, range queries and exports; created on the parent when partitioned.
+        Index('ix_sensor_readings_device_type_created', 'device_id', 'sensor_type', created_at.desc()),
+    )
+
+
+class SensorReadingRollup1m(Base):
+    """Per-minute aggregates of sensor_readings, maintained by app/rollups.py."""
+    __tablename__ = 'sensor_readings_rollup_1m'
+
+    device_id = Column(PG_UUID(as_uuid=True), primary_key=True)
+    sensor_type = Column(Enum(SensorType), primary_key=True)
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    min_value = Column(Numeric, nullable=False)
+    max_value = Column(Numeric, nullable=False)
+    sum_value = Column(Numeric, nullable=False)
+    count = Column(BigInteger, nullable=False)
+    last_value = Column(Numeric, nullable=False)
+    last_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class SensorReadingRollup1h(Base):
+    """Per-hour aggregates of sensor_readings, built from the 1 minute rollup."""
+    __tablename__ = 'sensor_readings_rollup_1h'
+
+    device_id = Column(PG_UUID(as_uuid=True), primary_key=True)
+    sensor_type = Column(Enum(SensorType), primary_key=True)
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    min_value = Column(Numeric, nullable=False)
+    max_value = Column(Numeric, nullable=False)
+    sum_value = Column(Numeric, nullable=False)
+    count = Column(BigInteger, nullable=False)
+    last_value = Column(Numeric, nullable=False)
+    last_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class SensorReadingDedup(Base):
+    """Idempotency keys of ingested readings, claimed by app/dedup.py. Not partitioned."""
+    __tablename__ = 'sensor_reading_dedup'
+
+    device_id = Column(PG_UUID(as_uuid=True), primary_key=True)
+    sensor_type = Column(Enum(SensorType), primary_key=True)
+    seq = Column(BigInteger, primary_key=True)
+    reading_id = Column(PG_UUID(as_uuid=True), nullable=False)
+    # created_at of the reading, so the original can be found with partition pruning.
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
 
 class DeviceOutlet(Base):
     __tablename__ = 'device_outlets'
@@ -98,6 +145,14 @@ class DeviceOutlet(Base):
     outlet_name = Column(String, nullable=False)
 
 
+class DeviceOutletRevision(Base):
+    """Revision of each device's device_outlets set, bumped by app/outlet_revisions.py."""
+    __tablename__ = 'device_outlet_revisions'
+
+    device_id = Column(PG_UUID(as_uuid=True), primary_key=True)
+    revision = Column(BigInteger, nullable=False)
+
+
 class AlertRule(Base):
     __tablename__ = 'alert_rules'
     
@@ -0,0 +1,203 @@
+"""
+Per-device revision numbers for the device_outlets set, used by the long-poll
+mode of GET /api/device-outlets.
+
+Revisions are stored in device_outlet_revisions (created by
+scripts/migrate_outlet_revisions.py), so every worker reports the same value.
+Every write to a device's outlets calls `bump` in the same transaction, which
+raises the revision to at least the current epoch milliseconds (so values stay
+comparable with the clock-seeded ones handed out before) and NOTIFYs
+OUTLET_REVISIONS_CHANNEL; Postgres delivers the notification on commit.
+
+Each worker LISTENs on the channel over one dedicated asyncpg connection and
+wakes the requests parked in `wait_for_change` for the notified devices; the
+writing worker also wakes its own with `publish` right after committing.
+Parked requests re-read their device's revision every
+OUTLET_REVISION_RECHECK_SECONDS, so a missed notification (listener
+reconnecting, or DB_PGBOUNCER, where LISTEN is unavailable and the listener is
+not started) only delays the wake-up. Devices never written to report 0.
+"""
+import asyncio
+import logging
+import os
+import threading
+from typing import Iterable, Optional
+from uuid import UUID
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import DB_PGBOUNCER, AsyncSessionLocal, asyncpg_connect_kwargs
+
+logger = logging.getLogger(__name__)
+
+OUTLET_REVISIONS_CHANNEL = "device_outlet_revisions"
+OUTLET_REVISION_RECHECK_SECONDS = float(os.getenv("OUTLET_REVISION_RECHECK_SECONDS", "10"))
+OUTLET_REVISION_LISTEN = not DB_PGBOUNCER and os.getenv("OUTLET_REVISION_LISTEN", "true").lower() in ("1", "true", "yes")
+LISTEN_RETRY_SECONDS = 5.0
+
+# NOTIFY payloads must stay under 8000 bytes; one entry is "<uuid>:<revision>".
+_NOTIFY_CHUNK = 100
+
+_BUMP_SQL = text(
+    """
+    INSERT INTO device_outlet_revisions AS r (device_id, revision)
+    SELECT device_id, (extract(epoch FROM clock_timestamp()) * 1000)::bigint
+    FROM unnest(CAST(:device_ids AS uuid[])) AS device_id
+    ON CONFLICT (device_id) DO UPDATE
+    SET revision = GREATEST(r.revision + 1, EXCLUDED.revision)
+    RETURNING device_id, revision
+    """
+)
+
+
+async def bump(db: AsyncSession, device_ids: Iterable[UUID]) -> dict[UUID, int]:
+    """
+    Give every device in device_ids a new revision and queue the notification,
+    in the caller's transaction. Caller commits, then passes the result to `tracker.publish`.
+    """
+    # Sorted, so concurrent bulk updates lock revision rows in the same order.
+    ids = sorted(set(device_ids))
+    if not ids:
+        return {}
+    result = await db.execute(_BUMP_SQL, {"device_ids": ids})
+    revisions = {row.device_id: row.revision for row in result.all()}
+    entries = [f"{device_id}:{revision}" for device_id, revision in revisions.items()]
+    for i in range(0, len(entries), _NOTIFY_CHUNK):
+        await db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": OUTLET_REVISIONS_CHANNEL, "payload": ",".join(entries[i:i + _NOTIFY_CHUNK])},
+        )
+    return revisions
+
+
+async def current(db: AsyncSession, device_id: UUID) -> int:
+    result = await db.execute(
+        text("SELECT revision FROM device_outlet_revisions WHERE device_id = :device_id"),
+        {"device_id": device_id},
+    )
+    return result.scalar() or 0
+
+
+async def current_many(db: AsyncSession, device_ids: list[UUID]) -> dict[UUID, int]:
+    """Revisions of device_ids in one query; devices never written to are left out (revision 0)."""
+    if not device_ids:
+        return {}
+    result = await db.execute(
+        text(
+            """
+            SELECT device_id, revision
+            FROM device_outlet_revisions
+            WHERE device_id = ANY(CAST(:device_ids AS uuid[]))
+            """
+        ),
+        {"device_ids": list(device_ids)},
+    )
+    return {row.device_id: row.revision for row in result.all()}
+
+
+def _parse_payload(payload: str) -> dict[UUID, int]:
+    revisions = {}
+    for entry in payload.split(","):
+        device_id, _, revision = entry.partition(":")
+        try:
+            revisions[UUID(device_id)] = int(revision)
+        except ValueError:
+            logger.warning("Ignoring malformed outlet revision notification %r", entry)
+    return revisions
+
+
+class OutletRevisionTracker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters: dict[UUID, set[tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def publish(self, revisions: dict[UUID, int]) -> None:
+        """Wake requests parked on any device in revisions."""
+        woken = []
+        with self._lock:
+            for device_id, revision in revisions.items():
+                woken.extend((waiter, revision) for waiter in self._waiters.pop(device_id, ()))
+        for (loop, future), revision in woken:
+            try:
+                loop.call_soon_threadsafe(_resolve, future, revision)
+            except RuntimeError:
+                pass
+
+    async def wait_for_change(self, device_id: UUID, since: int, timeout: float) -> int:
+        """Return as soon as the device's revision is newer than since, or after timeout."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            # Parked before reading, so a bump committed in between still wakes this request.
+            waiter = (loop, loop.create_future())
+            with self._lock:
+                self._waiters.setdefault(device_id, set()).add(waiter)
+            try:
+                async with AsyncSessionLocal() as db:
+                    revision = await current(db, device_id)
+                remaining = deadline - loop.time()
+                if revision > since or remaining <= 0:
+                    return revision
+                try:
+                    revision = await asyncio.wait_for(waiter[1], min(remaining, OUTLET_REVISION_RECHECK_SECONDS))
+                except asyncio.TimeoutError:
+                    continue
+                if revision > since:
+                    return revision
+            finally:
+                with self._lock:
+                    waiters = self._waiters.get(device_id)
+                    if waiters is not None:
+                        waiters.discard(waiter)
+                        if not waiters:
+                            del self._waiters[device_id]
+
+    def parked(self) -> int:
+        with self._lock:
+            return sum(len(w) for w in self._waiters.values())
+
+    async def start(self) -> None:
+        if OUTLET_REVISION_LISTEN and self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        self.publish(_parse_payload(payload))
+
+    async def _listen(self) -> None:
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(**asyncpg_connect_kwargs())
+                closed = asyncio.Event()
+                conn.add_termination_listener(lambda _conn: closed.set())
+                await conn.add_listener(OUTLET_REVISIONS_CHANNEL, self._on_notify)
+                await closed.wait()
+                logger.warning("Outlet revision listener connection closed; reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Outlet revision listener failed (%s); retrying in %ss", e, LISTEN_RETRY_SECONDS)
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            await asyncio.sleep(LISTEN_RETRY_SECONDS)
+
+
+def _resolve(future: asyncio.Future, revision: int) -> None:
+    if not future.done():
+        future.set_result(revision)
+
+
+tracker = OutletRevisionTracker()
@@ -0,0 +1,76 @@
+"""
+Compact binary encoding for sensor uploads from constrained devices.
+
+A body is one or more fixed-size little-endian frames (33 bytes each):
+
+    offset  size  field
+    0       16    device_id      UUID bytes (big-endian, as uuid.UUID.bytes)
+    16      1     sensor_type    code from SENSOR_TYPE_CODES
+    17      8     value          float64
+    25      8     timestamp_ms   int64 epoch milliseconds; 0 = use server time
+
+Frames decode straight into sensor_readings rows without going through Pydantic.
+"""
+import math
+import struct
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+CONTENT_TYPE = "application/x-safestrip-readings"
+
+FRAME = struct.Struct("<16sBdq")
+
+SENSOR_TYPE_CODES = {
+    1: "current",
+    2: "smoke",
+    3: "water",
+    4: "humidity",
+    5: "temp",
+}
+
+
+class PackedFrameError(ValueError):
+    pass
+
+
+def encode_frame(device_id: uuid.UUID, sensor_type: str, value: float, timestamp_ms: int = 0) -> bytes:
+    """Reference encoder (the firmware does the same with a packed C struct)."""
+    code = next(c for c, name in SENSOR_TYPE_CODES.items() if name == sensor_type)
+    return FRAME.pack(device_id.bytes, code, value, timestamp_ms)
+
+
+def decode_frames(body: bytes, now: datetime, latest: Optional[datetime] = None) -> list[dict[str, Any]]:
+    """
+    Decode a packed body into insertable rows. Raises PackedFrameError on malformed
+    input, or on a timestamp later than `latest` when given.
+    """
+    if not body or len(body) % FRAME.size:
+        raise PackedFrameError(f"Body length must be a positive multiple of {FRAME.size} bytes")
+    rows = []
+    for index, (device_bytes, code, value, timestamp_ms) in enumerate(FRAME.iter_unpack(body)):
+        sensor_type = SENSOR_TYPE_CODES.get(code)
+        if sensor_type is None:
+            raise PackedFrameError(f"Frame {index}: unknown sensor type code {code}")
+        if not math.isfinite(value):
+            raise PackedFrameError(f"Frame {index}: value is not finite")
+        created_at = now
+        if timestamp_ms:
+            try:
+                created_at = datetime.fromtimestamp(timestamp_ms / 1000.0, tz=timezone.utc)
+            except (ValueError, OverflowError, OSError):
+                raise PackedFrameError(f"Frame {index}: timestamp_ms {timestamp_ms} is out of range")
+            if latest is not None and created_at > latest:
+                raise PackedFrameError(f"Frame {index}: timestamp_ms {timestamp_ms} is too far in the future")
+        rows.append(
+            {
+                "id": uuid.uuid4(),
+                "device_id": uuid.UUID(bytes=device_bytes),
+                "sensor_type": sensor_type,
+                "value": value,
+                "unit": None,
+                "raw": None,
+                "created_at": created_at,
+            }
+        )
+    return rows
@@ -0,0 +1,87 @@
+"""
+Keyset pagination for list endpoints.
+
+Lists are ordered by a unique key, (created_at DESC, id DESC) for most tables,
+and a page starts strictly after the position encoded in an opaque `cursor`.
+Response bodies stay plain arrays: the cursor for the next page is returned in
+the X-Next-Cursor header, which is absent on the last page.
+"""
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence
+from uuid import UUID
+
+from fastapi import HTTPException, Query, Response
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "500"))
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def limit_query() -> Any:
+    return Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size")
+
+
+def cursor_query() -> Any:
+    return Query(default=None, description=f"Opaque cursor from the previous page's {NEXT_CURSOR_HEADER} header")
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else str(v) for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str, size: int) -> list[str]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def decode_created_at_cursor(cursor: Optional[str]) -> Optional[tuple[datetime, UUID]]:
+    """Decode a (created_at, id) cursor; None when there is no cursor."""
+    if cursor is None:
+        return None
+    created_at, row_id = _decode(cursor, 2)
+    try:
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def decode_id_cursor(cursor: Optional[str]) -> Optional[UUID]:
+    """Decode a single-uuid cursor; None when there is no cursor."""
+    if cursor is None:
+        return None
+    (row_id,) = _decode(cursor, 1)
+    try:
+        return UUID(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def page(
+    response: Response,
+    rows: Sequence[Any],
+    limit: int,
+    cursor_of: Callable[[Any], tuple],
+) -> Sequence[Any]:
+    """
+    Trim rows fetched with LIMIT limit + 1 to one page and set X-Next-Cursor
+    from the last row kept when there is more.
+    """
+    if len(rows) <= limit:
+        return rows
+    rows = rows[:limit]
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*cursor_of(rows[-1]))
+    return rows
+
+
+def created_at_key(row: Any) -> tuple:
+    return (row["created_at"], row["id"])
@@ -0,0 +1,245 @@
+"""
+Time partitioning of sensor_readings.
+
+After scripts/migrate_sensor_readings_partitioned.py has turned sensor_readings
+into a table partitioned by RANGE (created_at), the maintenance job:
+
+- creates the partitions for the current period and PARTITIONS_AHEAD periods ahead,
+  moving any rows the default partition already holds for them;
+- rolls up, then drops, partitions that ended more than SENSOR_READINGS_RETENTION_DAYS ago
+  (0 keeps raw data forever);
+- deletes 1 minute rollups older than ROLLUP_1M_RETENTION_DAYS (0 keeps them).
+
+The (device_id, sensor_type, created_at DESC) index is defined on the parent,
+so every partition gets it. Enable with PARTITION_MAINTENANCE_ENABLED=1.
+"""
+import logging
+import os
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, text
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .models import SensorReadingRollup1m
+from .rollups import run_rollups
+
+logger = logging.getLogger(__name__)
+
+PARTITION_MAINTENANCE_ENABLED = os.getenv("PARTITION_MAINTENANCE_ENABLED", "").lower() in ("1", "true", "yes")
+PARTITION_GRANULARITY = os.getenv("SENSOR_READINGS_PARTITION", "daily").lower()
+PARTITIONS_AHEAD = int(os.getenv("SENSOR_READINGS_PARTITIONS_AHEAD", "3"))
+RETENTION_DAYS = int(os.getenv("SENSOR_READINGS_RETENTION_DAYS", "0"))
+ROLLUP_1M_RETENTION_DAYS = int(os.getenv("ROLLUP_1M_RETENTION_DAYS", "0"))
+MAINTENANCE_INTERVAL_SECONDS = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL_SECONDS", "3600"))
+
+PARENT_TABLE = "sensor_readings"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+_MOVED_TABLE = "sensor_readings_moved"
+_NAME_RE = re.compile(rf"^{PARENT_TABLE}_p(\d{{6}}|\d{{8}})$")
+
+
+def period_start(value: datetime, granularity: str) -> datetime:
+    value = value.astimezone(timezone.utc)
+    if granularity == "monthly":
+        return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+    return datetime(value.year, value.month, value.day, tzinfo=timezone.utc)
+
+
+def next_period(start: datetime, granularity: str) -> datetime:
+    if granularity == "monthly":
+        return datetime(start.year + start.month // 12, start.month % 12 + 1, 1, tzinfo=timezone.utc)
+    return start + timedelta(days=1)
+
+
+def partition_name(start: datetime, granularity: str) -> str:
+    fmt = "%Y%m" if granularity == "monthly" else "%Y%m%d"
+    return f"{PARENT_TABLE}_p{start.strftime(fmt)}"
+
+
+def partition_range(name: str) -> Optional[tuple[datetime, datetime]]:
+    """[start, end) of a partition from its name, or None for names we don't manage."""
+    match = _NAME_RE.match(name)
+    if not match:
+        return None
+    digits = match.group(1)
+    if len(digits) == 6:
+        start = datetime.strptime(digits, "%Y%m").replace(tzinfo=timezone.utc)
+        return start, next_period(start, "monthly")
+    start = datetime.strptime(digits, "%Y%m%d").replace(tzinfo=timezone.utc)
+    return start, next_period(start, "daily")
+
+
+def create_partition_sql(start: datetime, granularity: str) -> str:
+    end = next_period(start, granularity)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(start, granularity)} "
+        f"PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def is_partitioned(db: Session) -> bool:
+    return bool(
+        db.execute(
+            text(
+                """
+                SELECT 1
+                FROM pg_partitioned_table pt
+                JOIN pg_class c ON c.oid = pt.partrelid
+                WHERE c.relname = :table AND pg_table_is_visible(c.oid)
+                """
+            ),
+            {"table": PARENT_TABLE},
+        ).first()
+    )
+
+
+def list_partitions(db: Session) -> list[str]:
+    rows = db.execute(
+        text(
+            """
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = :table AND pg_table_is_visible(p.oid)
+            """
+        ),
+        {"table": PARENT_TABLE},
+    ).scalars().all()
+    return list(rows)
+
+
+def _move_out_of_default(db: Session, start: datetime, end: datetime) -> Optional[str]:
+    """
+    Take rows in [start, end) out of the default partition into a temp table,
+    since Postgres refuses to attach a partition whose range the default holds.
+    Returns the temp table to re-insert from once the partition exists.
+    """
+    params = {"start": start, "end": end}
+    found = db.execute(
+        text(f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end LIMIT 1"),
+        params,
+    ).first()
+    if not found:
+        return None
+    db.execute(text(f"CREATE TEMP TABLE {_MOVED_TABLE} (LIKE {PARENT_TABLE}) ON COMMIT DROP"))
+    db.execute(
+        text(
+            f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE created_at >= :start AND created_at < :end
+                RETURNING *
+            )
+            INSERT INTO {_MOVED_TABLE} SELECT * FROM moved
+            """
+        ),
+        params,
+    )
+    return _MOVED_TABLE
+
+
+def ensure_partitions(db: Session, now: datetime) -> list[str]:
+    """
+    Create partitions for the current period and PARTITIONS_AHEAD ahead. Rows that
+    already sit in the default partition for a new period are moved into it.
+    Caller commits.
+    """
+    created = []
+    existing = set(list_partitions(db))
+    start = period_start(now, PARTITION_GRANULARITY)
+    for _ in range(PARTITIONS_AHEAD + 1):
+        name = partition_name(start, PARTITION_GRANULARITY)
+        if name not in existing:
+            moved = None
+            if DEFAULT_PARTITION in existing:
+                moved = _move_out_of_default(db, start, next_period(start, PARTITION_GRANULARITY))
+            db.execute(text(create_partition_sql(start, PARTITION_GRANULARITY)))
+            if moved:
+                db.execute(text(f"INSERT INTO {PARENT_TABLE} SELECT * FROM {moved}"))
+                db.execute(text(f"DROP TABLE {moved}"))
+                logger.warning("Moved rows for %s out of %s", name, DEFAULT_PARTITION)
+            created.append(name)
+        start = next_period(start, PARTITION_GRANULARITY)
+    return created
+
+
+def expire_partitions(db: Session, now: datetime) -> list[str]:
+    """Roll up and drop partitions past retention, one transaction each."""
+    if not RETENTION_DAYS:
+        return []
+    cutoff = now - timedelta(days=RETENTION_DAYS)
+    dropped = []
+    for name in sorted(list_partitions(db)):
+        bounds = partition_range(name)
+        if bounds is None or bounds[1] > cutoff:
+            continue
+        # Make sure the rollups cover the partition before its raw rows go away.
+        run_rollups(db, bounds[0], bounds[1])
+        db.execute(text(f"DROP TABLE {name}"))
+        db.commit()
+        dropped.append(name)
+    return dropped
+
+
+def expire_minute_rollups(db: Session, now: datetime) -> None:
+    if ROLLUP_1M_RETENTION_DAYS:
+        db.execute(
+            delete(SensorReadingRollup1m).where(
+                SensorReadingRollup1m.bucket_start < now - timedelta(days=ROLLUP_1M_RETENTION_DAYS)
+            )
+        )
+        db.commit()
+
+
+def run_once(now: Optional[datetime] = None) -> None:
+    now = now or datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        if not is_partitioned(db):
+            logger.warning("%s is not partitioned; skipping partition maintenance", PARENT_TABLE)
+            return
+        created = ensure_partitions(db, now)
+        db.commit()
+        dropped = expire_partitions(db, now)
+        expire_minute_rollups(db, now)
+        if created or dropped:
+            logger.info("sensor_readings partitions created=%s dropped=%s", created, dropped)
+    except Exception:
+        logger.exception("sensor_readings partition maintenance failed")
+        db.rollback()
+    finally:
+        db.close()
+
+
+class PartitionMaintenanceJob:
+    def __init__(self, interval_seconds: float):
+        self.interval = interval_seconds
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="sensor-partitions", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            run_once()
+            self._stopping.wait(self.interval)
+
+
+job = PartitionMaintenanceJob(MAINTENANCE_INTERVAL_SECONDS)
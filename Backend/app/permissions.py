@@ -1,44 +1,77 @@
 """
 Workspace role helpers for permission checks.
+
+Resolved roles are cached per (workspace_id, user_id) for ROLE_CACHE_TTL_SECONDS.
+Routes that change membership must call `invalidate_role` / `invalidate_workspace`
+after committing.
 """
+import os
 from typing import Optional
 from uuid import UUID
 
 from fastapi import HTTPException
 from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .cache import LRUCache, MISSING
 
 ROLE_LEVEL = {"OWNER": 4, "ADMIN": 3, "MEMBER": 2, "VIEWER": 1}
 
+_role_cache = LRUCache(
+    max_entries=int(os.getenv("ROLE_CACHE_MAX_ENTRIES", "10000")),
+    ttl_seconds=float(os.getenv("ROLE_CACHE_TTL_SECONDS", "30")),
+)
+
 
-def get_member_role(db: Session, workspace_id: UUID, user_id: UUID) -> Optional[str]:
+async def get_member_role(db: AsyncSession, workspace_id: UUID, user_id: UUID) -> Optional[str]:
     """
     Returns the user's role in the workspace, or None if not a member.
     Treats workspace.created_by as OWNER when no membership row exists.
     """
-    row = db.execute(
+    key = (workspace_id, user_id)
+    role = _role_cache.get(key)
+    if role is not MISSING:
+        return role
+    result = await db.execute(
         text(
             """
-            SELECT wm.role
-            FROM workspace_members wm
-            WHERE wm.workspace_id = :workspace_id AND wm.user_id = :user_id
+            SELECT COALESCE(
+                (
+                    SELECT wm.role
+                    FROM workspace_members wm
+                    WHERE wm.workspace_id = :workspace_id AND wm.user_id = :user_id
+                ),
+                (
+                    SELECT 'OWNER'
+                    FROM workspaces w
+                    WHERE w.id = :workspace_id AND w.created_by = :user_id
+                )
+            ) AS role
             """
         ),
         {"workspace_id": workspace_id, "user_id": user_id},
-    ).mappings().first()
-    if row:
-        return row["role"]
-    creator_row = db.execute(
-        text("SELECT created_by FROM workspaces WHERE id = :workspace_id"),
-        {"workspace_id": workspace_id},
-    ).mappings().first()
-    if creator_row and creator_row["created_by"] == user_id:
-        return "OWNER"
-    return None
-
-
-def require_role(
-    db: Session,
+    )
+    role = result.scalar()
+    _role_cache.set(key, role)
+    return role
+
+
+def invalidate_role(workspace_id: UUID, user_id: UUID) -> None:
+    """Forget the cached role of one user in one workspace."""
+    _role_cache.pop((workspace_id, user_id))
+
+
+def invalidate_workspace(workspace_id: UUID) -> None:
+    """Forget every cached role in a workspace."""
+    _role_cache.discard_where(lambda key: key[0] == workspace_id)
+
+
+def role_cache_stats() -> dict:
+    return _role_cache.stats()
+
+
+async def require_role(
+    db: AsyncSession,
     workspace_id: UUID,
     user_id: Optional[UUID],
     min_role: str,
@@ -49,7 +82,7 @@ def require_role(
     """
     if not user_id:
         raise HTTPException(status_code=401, detail="User ID required (X-User-Id header)")
-    role = get_member_role(db, workspace_id, user_id)
+    role = await get_member_role(db, workspace_id, user_id)
     if not role:
         raise HTTPException(status_code=403, detail="Not a member of this workspace")
     if ROLE_LEVEL.get(role, 0) < ROLE_LEVEL.get(min_role, 0):
@@ -0,0 +1,112 @@
+"""
+Connection pool instrumentation.
+
+`instrumented_pool_class` wraps a SQLAlchemy pool class so the time spent
+waiting for a connection (including opening a new one when the pool grows
+into overflow) and checkout timeouts are recorded in a `PoolStats`.
+`attach_listeners` counts connects and invalidations through pool events.
+"""
+import bisect
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import event, exc
+
+# Upper bounds (ms) of the checkout wait histogram buckets; the last bucket is open-ended.
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class PoolStats:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.pool = None
+
+    def record_wait(self, seconds: float) -> None:
+        ms = seconds * 1000.0
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total_ms += ms
+            self.wait_max_ms = max(self.wait_max_ms, ms)
+            self.wait_buckets[bisect.bisect_left(WAIT_BUCKETS_MS, ms)] += 1
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        pool = self.pool
+        with self._lock:
+            data = {
+                "checkouts_total": self.checkouts,
+                "checkout_timeouts_total": self.timeouts,
+                "connects_total": self.connects,
+                "invalidations_total": self.invalidations,
+                "wait_avg_ms": round(self.wait_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max_ms, 3),
+                "wait_total_ms": round(self.wait_total_ms, 3),
+                "wait_histogram_ms": dict(
+                    zip([str(b) for b in WAIT_BUCKETS_MS] + ["+Inf"], self.wait_buckets)
+                ),
+            }
+        if pool is not None and hasattr(pool, "checkedout"):
+            data.update(
+                {
+                    "size": pool.size(),
+                    "checked_out": pool.checkedout(),
+                    "checked_in": pool.checkedin(),
+                    "overflow": pool.overflow(),
+                }
+            )
+        return data
+
+
+def instrumented_pool_class(base: type, stats: PoolStats) -> type:
+    """Subclass of pool class `base` that reports checkout waits to stats."""
+
+    class InstrumentedPool(base):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                record = super()._do_get()
+            except exc.TimeoutError:
+                stats.record_timeout()
+                raise
+            stats.record_wait(time.perf_counter() - started)
+            return record
+
+    InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+    return InstrumentedPool
+
+
+def attach_listeners(engine, stats: PoolStats) -> None:
+    """Hook pool events of a (sync) engine into stats."""
+    stats.pool = engine.pool
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        stats.record_connect()
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        stats.record_invalidation()
+
+    @event.listens_for(engine, "engine_disposed")
+    def _on_dispose(engine_):
+        stats.pool = engine_.pool
@@ -0,0 +1,240 @@
+"""
+Device presence: devices.last_seen_at and devices.status maintained from ingest.
+
+Ingest calls `touch(device_id)`, which only records the time in memory. A
+background thread writes the pending times every PRESENCE_FLUSH_SECONDS as
+one coalesced UPDATE ... FROM (VALUES ...) and marks those devices 'online'.
+
+Offline detection uses a hashed timing wheel with one slot per flush tick:
+a touch (re)schedules the device DEVICE_OFFLINE_AFTER_SECONDS ahead, and each
+tick takes the devices whose slot came due and flips them to 'offline' in one
+UPDATE, without scanning the devices table. The UPDATE re-checks last_seen_at,
+so a device kept alive by another worker is left online.
+
+Devices already 'online' when the process starts are loaded into the wheel once.
+Enable with DEVICE_PRESENCE_ENABLED=1.
+"""
+import logging
+import math
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+from uuid import UUID
+
+from sqlalchemy import bindparam, text
+
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+PRESENCE_ENABLED = os.getenv("DEVICE_PRESENCE_ENABLED", "").lower() in ("1", "true", "yes")
+PRESENCE_FLUSH_SECONDS = float(os.getenv("PRESENCE_FLUSH_SECONDS", "5"))
+OFFLINE_AFTER_SECONDS = float(os.getenv("DEVICE_OFFLINE_AFTER_SECONDS", "120"))
+
+ONLINE_STATUS = "online"
+OFFLINE_STATUS = "offline"
+
+
+class TimingWheel:
+    """Hashed timing wheel of device ids. Not thread-safe; PresenceTracker locks around it."""
+
+    def __init__(self, ticks: int):
+        self.ticks = ticks
+        self._slots: list[set[UUID]] = [set() for _ in range(ticks + 1)]
+        self._slot_of: dict[UUID, int] = {}
+        self._cursor = 0
+
+    def schedule(self, device_id: UUID, ticks: Optional[int] = None) -> None:
+        """Expire device_id after `ticks` more advances (default: the full timeout)."""
+        ticks = self.ticks if ticks is None else max(1, min(ticks, self.ticks))
+        slot = (self._cursor + ticks) % len(self._slots)
+        current = self._slot_of.get(device_id)
+        if current == slot:
+            return
+        if current is not None:
+            self._slots[current].discard(device_id)
+        self._slots[slot].add(device_id)
+        self._slot_of[device_id] = slot
+
+    def advance(self) -> set[UUID]:
+        """Move one tick forward and return the devices that came due."""
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        expired = self._slots[self._cursor]
+        self._slots[self._cursor] = set()
+        for device_id in expired:
+            del self._slot_of[device_id]
+        return expired
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+
+class PresenceTracker:
+    def __init__(self, flush_seconds: float, offline_after_seconds: float):
+        self.flush_seconds = flush_seconds
+        self.offline_after_seconds = offline_after_seconds
+        self._wheel = TimingWheel(max(1, math.ceil(offline_after_seconds / flush_seconds)))
+        self._pending: dict[UUID, datetime] = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._touches = 0
+        self._flushes = 0
+        self._flushed_devices = 0
+        self._offline_devices = 0
+
+    def touch(self, device_ids: Any, seen_at: Optional[datetime] = None) -> None:
+        """Record that device_ids (one id or an iterable) were just heard from."""
+        seen_at = seen_at or datetime.now(timezone.utc)
+        if isinstance(device_ids, UUID):
+            device_ids = (device_ids,)
+        with self._lock:
+            for device_id in device_ids:
+                self._pending[device_id] = seen_at
+                self._wheel.schedule(device_id)
+                self._touches += 1
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="device-presence", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Final device presence flush failed")
+
+    def _run(self) -> None:
+        try:
+            self.load_online()
+        except Exception:
+            logger.exception("Failed to load online devices")
+        while not self._stopping.wait(self.flush_seconds):
+            try:
+                self.flush()
+                self.expire()
+            except Exception:
+                logger.exception("Device presence iteration failed")
+
+    def load_online(self) -> None:
+        """Schedule devices left 'online' by a previous process according to their last_seen_at."""
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                text("SELECT id, last_seen_at FROM devices WHERE status = :online"),
+                {"online": ONLINE_STATUS},
+            ).all()
+        finally:
+            db.close()
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            for device_id, last_seen_at in rows:
+                if device_id in self._pending:
+                    continue
+                remaining = self.offline_after_seconds
+                if last_seen_at is not None:
+                    if last_seen_at.tzinfo is None:
+                        last_seen_at = last_seen_at.replace(tzinfo=timezone.utc)
+                    remaining -= (now - last_seen_at).total_seconds()
+                self._wheel.schedule(device_id, math.ceil(remaining / self.flush_seconds))
+
+    def flush(self) -> int:
+        """Write pending last_seen_at values in one UPDATE. Returns devices written."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        values = []
+        params: dict[str, Any] = {"online": ONLINE_STATUS}
+        for i, (device_id, seen_at) in enumerate(pending.items()):
+            values.append(f"(CAST(:id_{i} AS uuid), CAST(:seen_{i} AS timestamptz))")
+            params[f"id_{i}"] = device_id
+            params[f"seen_{i}"] = seen_at
+        stmt = text(
+            f"""
+            UPDATE devices AS d
+            SET last_seen_at = GREATEST(d.last_seen_at, v.seen_at),
+                status = :online
+            FROM (VALUES {", ".join(values)}) AS v(id, seen_at)
+            WHERE d.id = v.id
+            """
+        )
+
+        db = SessionLocal()
+        try:
+            db.execute(stmt, params)
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Keep the newer of the failed and any since-recorded times for the next flush.
+            with self._lock:
+                for device_id, seen_at in pending.items():
+                    if self._pending.get(device_id, seen_at) <= seen_at:
+                        self._pending[device_id] = seen_at
+            raise
+        finally:
+            db.close()
+
+        with self._lock:
+            self._flushes += 1
+            self._flushed_devices += len(pending)
+        return len(pending)
+
+    def expire(self) -> int:
+        """Advance the wheel one tick and mark the devices that came due offline."""
+        with self._lock:
+            expired = self._wheel.advance()
+        if not expired:
+            return 0
+
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.offline_after_seconds)
+        db = SessionLocal()
+        try:
+            result = db.execute(
+                text(
+                    """
+                    UPDATE devices
+                    SET status = :offline
+                    WHERE id IN :ids
+                      AND status = :online
+                      AND (last_seen_at IS NULL OR last_seen_at < :cutoff)
+                    """
+                ).bindparams(bindparam("ids", expanding=True)),
+                {"offline": OFFLINE_STATUS, "online": ONLINE_STATUS, "ids": list(expired), "cutoff": cutoff},
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        with self._lock:
+            self._offline_devices += result.rowcount
+        return result.rowcount
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "tracked_devices": len(self._wheel),
+                "pending_devices": len(self._pending),
+                "touches_total": self._touches,
+                "flushes_total": self._flushes,
+                "flushed_devices_total": self._flushed_devices,
+                "offline_devices_total": self._offline_devices,
+                "flush_seconds": self.flush_seconds,
+                "offline_after_seconds": self.offline_after_seconds,
+            }
+
+
+tracker = PresenceTracker(PRESENCE_FLUSH_SECONDS, OFFLINE_AFTER_SECONDS)
@@ -0,0 +1,115 @@
+"""
+In-process pub/sub fan-out of newly ingested sensor readings.
+
+Ingest paths call `broker.publish` once per reading; every open
+GET /sensor-readings/stream subscriber for that device gets it on its own
+bounded asyncio queue. A short per-device history lets reconnecting clients
+resume from the last event id they saw.
+"""
+import asyncio
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Optional
+from uuid import UUID
+
+HISTORY_PER_DEVICE = int(os.getenv("SSE_HISTORY_PER_DEVICE", "64"))
+HISTORY_MAX_DEVICES = int(os.getenv("SSE_HISTORY_MAX_DEVICES", "2048"))
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("SSE_SUBSCRIBER_QUEUE_SIZE", "256"))
+
+
+class Subscription:
+    def __init__(self, device_id: UUID, sensor_type: Optional[str], loop: asyncio.AbstractEventLoop):
+        self.device_id = device_id
+        self.sensor_type = sensor_type
+        self.loop = loop
+        self.queue: asyncio.Queue[tuple[int, dict[str, Any]]] = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.dropped = 0
+
+    def wants(self, reading: dict[str, Any]) -> bool:
+        return self.sensor_type is None or reading["sensor_type"] == self.sensor_type
+
+    def _offer(self, event: tuple[int, dict[str, Any]]) -> None:
+        # Runs on the subscriber's loop. A slow consumer loses its oldest events.
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+class ReadingBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Event ids are seeded from wall-clock time so they keep increasing across restarts.
+        self._seq = itertools.count(int(time.time() * 1000) * 1000)
+        self._last_seq = 0
+        self._subscribers: dict[UUID, set[Subscription]] = {}
+        self._history: OrderedDict[UUID, deque[tuple[int, dict[str, Any]]]] = OrderedDict()
+        self.published = 0
+
+    def publish(self, device_id: UUID, reading: dict[str, Any]) -> int:
+        """Fan a reading out to the device's subscribers. Safe to call from any thread."""
+        with self._lock:
+            seq = next(self._seq)
+            self._last_seq = seq
+            self.published += 1
+            history = self._history.get(device_id)
+            if history is None:
+                history = self._history[device_id] = deque(maxlen=HISTORY_PER_DEVICE)
+                while len(self._history) > HISTORY_MAX_DEVICES:
+                    self._history.popitem(last=False)
+            else:
+                self._history.move_to_end(device_id)
+            history.append((seq, reading))
+            subscribers = [s for s in self._subscribers.get(device_id, ()) if s.wants(reading)]
+
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(sub._offer, (seq, reading))
+            except RuntimeError:
+                # Subscriber's loop is closed; it will be unsubscribed by its stream.
+                pass
+        return seq
+
+    def subscribe(
+        self,
+        device_id: UUID,
+        sensor_type: Optional[str],
+        last_event_id: Optional[int] = None,
+    ) -> tuple[Subscription, list[tuple[int, dict[str, Any]]]]:
+        """
+        Register a subscriber on the running loop. Returns it together with the
+        retained events newer than last_event_id, with no gap or overlap between them.
+        """
+        sub = Subscription(device_id, sensor_type, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(device_id, set()).add(sub)
+            backlog: list[tuple[int, dict[str, Any]]] = []
+            if last_event_id is not None and last_event_id <= self._last_seq:
+                backlog = [
+                    (seq, reading)
+                    for seq, reading in self._history.get(device_id, ())
+                    if seq > last_event_id and sub.wants(reading)
+                ]
+        return sub, backlog
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subscribers.get(sub.device_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.device_id]
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "published_total": self.published,
+                "devices_with_subscribers": len(self._subscribers),
+                "subscribers": sum(len(s) for s in self._subscribers.values()),
+            }
+
+
+broker = ReadingBroker()
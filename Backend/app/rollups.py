@@ -0,0 +1,220 @@
+"""
+Time-bucketed aggregation of sensor_readings.
+
+`bucket_start` buckets a timestamp column into epoch-aligned buckets in SQL.
+The rollup job keeps two summary tables up to date so long ranges don't scan
+raw rows: sensor_readings_rollup_1m (from raw readings) and
+sensor_readings_rollup_1h (from the 1 minute rollup). Each run re-aggregates
+the last ROLLUP_LOOKBACK_MINUTES so slightly late device timestamps are picked
+up. Ingest reports older rows (batch/frame backfills) with `mark_written`; the
+minutes they fall in, and their hours, are re-aggregated on the next run. That
+tracking is per process, like the job itself.
+
+Create the tables with scripts/migrate_rollup_tables.py, then enable with
+ROLLUPS_ENABLED=1. Existing history must be backfilled once with
+scripts/backfill_rollups.py, otherwise ranges before the first run read as empty.
+"""
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg, insert as pg_insert
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .models import SensorReading, SensorReadingRollup1h, SensorReadingRollup1m
+
+logger = logging.getLogger(__name__)
+
+ROLLUPS_ENABLED = os.getenv("ROLLUPS_ENABLED", "").lower() in ("1", "true", "yes")
+ROLLUP_INTERVAL_SECONDS = float(os.getenv("ROLLUP_INTERVAL_SECONDS", "60"))
+ROLLUP_LOOKBACK_MINUTES = int(os.getenv("ROLLUP_LOOKBACK_MINUTES", "10"))
+
+# Rollup tables by bucket width in seconds, widest first.
+ROLLUP_TABLES = ((3600, SensorReadingRollup1h), (60, SensorReadingRollup1m))
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# End of the window covered by the last successful rollup run in this process.
+watermark: Optional[datetime] = None
+
+# Minute buckets written to after they may already have been rolled up.
+_dirty_minutes: set[datetime] = set()
+_dirty_lock = threading.Lock()
+
+
+def bucket_start(column, bucket_seconds: int):
+    """SQL expression flooring column to an epoch-aligned bucket of bucket_seconds."""
+    # Inlined rather than bound so the expression is textually identical in SELECT and GROUP BY.
+    width = literal_column(str(int(bucket_seconds)))
+    return func.to_timestamp(func.floor(func.extract("epoch", column) / width) * width)
+
+
+def floor_to_bucket(value: datetime, bucket_seconds: int) -> datetime:
+    seconds = int((value - _EPOCH).total_seconds())
+    return _EPOCH + timedelta(seconds=seconds - seconds % bucket_seconds)
+
+
+def _upsert(db: Session, table, source) -> None:
+    columns = ["device_id", "sensor_type", "bucket_start", "min_value", "max_value",
+               "sum_value", "count", "last_value", "last_at"]
+    stmt = pg_insert(table).from_select(columns, source)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["device_id", "sensor_type", "bucket_start"],
+        set_={c: stmt.excluded[c] for c in columns[3:]},
+    )
+    db.execute(stmt)
+
+
+def rollup_minutes(db: Session, start: datetime, end: datetime) -> None:
+    """Recompute 1 minute buckets in [start, end) from raw readings. start must be minute-aligned."""
+    r = SensorReading
+    bucket = bucket_start(r.created_at, 60)
+    source = (
+        select(
+            r.device_id,
+            r.sensor_type,
+            bucket,
+            func.min(r.value),
+            func.max(r.value),
+            func.sum(r.value),
+            func.count(),
+            array_agg(aggregate_order_by(r.value, r.created_at.desc()))[1],
+            func.max(r.created_at),
+        )
+        .where(r.created_at >= start, r.created_at < end)
+        .group_by(r.device_id, r.sensor_type, bucket)
+    )
+    _upsert(db, SensorReadingRollup1m, source)
+
+
+def rollup_hours(db: Session, start: datetime, end: datetime) -> None:
+    """Recompute 1 hour buckets in [start, end) from the 1 minute rollup. start must be hour-aligned."""
+    m = SensorReadingRollup1m
+    bucket = bucket_start(m.bucket_start, 3600)
+    source = (
+        select(
+            m.device_id,
+            m.sensor_type,
+            bucket,
+            func.min(m.min_value),
+            func.max(m.max_value),
+            func.sum(m.sum_value),
+            func.sum(m.count),
+            array_agg(aggregate_order_by(m.last_value, m.last_at.desc()))[1],
+            func.max(m.last_at),
+        )
+        .where(m.bucket_start >= start, m.bucket_start < end)
+        .group_by(m.device_id, m.sensor_type, bucket)
+    )
+    _upsert(db, SensorReadingRollup1h, source)
+
+
+def run_rollups(db: Session, start: datetime, end: datetime) -> None:
+    """Refresh both rollup tables for [start, end). Caller commits."""
+    minute_start = floor_to_bucket(start, 60)
+    rollup_minutes(db, minute_start, end)
+    rollup_hours(db, floor_to_bucket(minute_start, 3600), end)
+
+
+def mark_written(rows: list[dict[str, Any]], now: Optional[datetime] = None) -> None:
+    """Record the minutes of committed rows older than a minute, so the next run re-aggregates them."""
+    if not ROLLUPS_ENABLED or not rows:
+        return
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(minutes=1)
+    minutes = set()
+    for row in rows:
+        created_at = row["created_at"]
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        if created_at < cutoff:
+            minutes.add(floor_to_bucket(created_at, 60))
+    if minutes:
+        with _dirty_lock:
+            _dirty_minutes.update(minutes)
+
+
+def _ranges(buckets: set[datetime], bucket_seconds: int) -> list[tuple[datetime, datetime]]:
+    """Coalesce bucket starts into [start, end) ranges of adjacent buckets."""
+    width = timedelta(seconds=bucket_seconds)
+    ranges: list[list[datetime]] = []
+    for bucket in sorted(buckets):
+        if ranges and ranges[-1][1] == bucket:
+            ranges[-1][1] = bucket + width
+        else:
+            ranges.append([bucket, bucket + width])
+    return [(lo, hi) for lo, hi in ranges]
+
+
+def run_dirty(db: Session, minutes: set[datetime], covered_from: datetime) -> None:
+    """Re-aggregate dirty minutes before covered_from, then their hours. Caller commits."""
+    minutes = {m for m in minutes if m < covered_from}
+    for lo, hi in _ranges(minutes, 60):
+        rollup_minutes(db, lo, hi)
+    hours = {floor_to_bucket(m, 3600) for m in minutes}
+    for lo, hi in _ranges({h for h in hours if h < floor_to_bucket(covered_from, 3600)}, 3600):
+        rollup_hours(db, lo, hi)
+
+
+def run_once(now: Optional[datetime] = None) -> None:
+    global watermark
+    now = now or datetime.now(timezone.utc)
+    end = floor_to_bucket(now, 60)
+    start = end - timedelta(minutes=ROLLUP_LOOKBACK_MINUTES)
+    with _dirty_lock:
+        dirty = set(_dirty_minutes)
+        _dirty_minutes.clear()
+    db = SessionLocal()
+    try:
+        run_rollups(db, start, end)
+        run_dirty(db, dirty, start)
+        db.commit()
+        watermark = end
+    except Exception:
+        logger.exception("Sensor readings rollup failed for [%s, %s)", start, end)
+        db.rollback()
+        with _dirty_lock:
+            _dirty_minutes.update(dirty)
+    finally:
+        db.close()
+
+
+def rollup_source(bucket_seconds: int) -> Optional[Any]:
+    """Widest rollup table whose buckets tile bucket_seconds, if rollups are current."""
+    if watermark is None:
+        return None
+    for width, table in ROLLUP_TABLES:
+        if bucket_seconds % width == 0:
+            return table
+    return None
+
+
+class RollupJob:
+    def __init__(self, interval_seconds: float):
+        self.interval = interval_seconds
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="sensor-rollups", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            run_once()
+            self._stopping.wait(self.interval)
+
+
+job = RollupJob(ROLLUP_INTERVAL_SECONDS)
@@ -1,18 +1,23 @@
 import logging
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Query
-from pydantic import BaseModel
-from sqlalchemy import text
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Response
+from pydantic import BaseModel, Field, model_validator
+from sqlalchemy import bindparam, text
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database import get_db
+from .. import outlet_revisions, serializers
+from ..database import get_async_db
+from ..permissions import require_role
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/device-outlets", tags=["device-outlets"])
 
+# Upper bound on outlet_ids accepted by a single bulk PATCH /api/device-outlets.
+MAX_BULK_OUTLETS = 1000
+
 
 class DeviceOutletRow(BaseModel):
     id: UUID
@@ -21,55 +26,169 @@ class DeviceOutletRow(BaseModel):
     outlet_name: str
 
 
+async def _fetch_device_outlets(db: AsyncSession, device_id: UUID) -> list[dict]:
+    result = await db.execute(
+        text(
+            """
+            SELECT id, device_id, is_active, outlet_name
+            FROM device_outlets
+            WHERE device_id = :device_id
+            ORDER BY outlet_name ASC
+            """
+        ),
+        {"device_id": device_id},
+    )
+    return [serializers.encode_outlet(row) for row in result.mappings().all()]
+
+
 @router.get("", response_model=List[DeviceOutletRow])
-def list_device_outlets(
+async def list_device_outlets(
+    response: Response,
     device_id: UUID = Query(..., description="Device UUID"),
-    db: Session = Depends(get_db),
+    since: Optional[int] = Query(default=None, description="Outlet revision the caller already has"),
+    wait: int = Query(default=0, ge=0, le=60, description="Seconds to wait for a change after `since`"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Return all outlets for a given device_id.
     Intended for demo/testing with a fixed device UUID.
+
+    The current outlet revision is returned in the `X-Outlets-Revision` header.
+    With `since` and `wait`, the request is held until an outlet of the device
+    changes past that revision or `wait` seconds elapse, then returns the state.
+    """
+    if since is not None and wait:
+        await outlet_revisions.tracker.wait_for_change(device_id, since, wait)
+    try:
+        # Read before the outlets, so a write in between is seen as a newer revision next time.
+        revision = await outlet_revisions.current(db, device_id)
+        outlets = await _fetch_device_outlets(db, device_id)
+    except Exception as e:
+        logger.exception("Failed to list device outlets")
+        raise HTTPException(status_code=500, detail=str(e))
+    response.headers["X-Outlets-Revision"] = str(revision)
+    return serializers.json_response(outlets, response)
+
+
+class DeviceOutletUpdate(BaseModel):
+    is_active: bool
+
+
+class DeviceOutletBulkUpdate(BaseModel):
+    """Set is_active on a list of outlets, or on every outlet of a workspace."""
+
+    is_active: bool
+    outlet_ids: Optional[List[UUID]] = Field(default=None, min_length=1, max_length=MAX_BULK_OUTLETS)
+    workspace_id: Optional[UUID] = None
+
+    @model_validator(mode="after")
+    def one_target(self) -> "DeviceOutletBulkUpdate":
+        if (self.outlet_ids is None) == (self.workspace_id is None):
+            raise ValueError("Provide exactly one of outlet_ids or workspace_id")
+        return self
+
+
+async def _outlet_workspaces(db: AsyncSession, outlet_ids: list[UUID]) -> list[UUID]:
+    """Workspaces owning the devices of the given outlets."""
+    result = await db.execute(
+        text(
+            """
+            SELECT DISTINCT d.workspace_id
+            FROM device_outlets AS o
+            JOIN devices AS d ON d.id = o.device_id
+            WHERE o.id IN :outlet_ids AND d.workspace_id IS NOT NULL
+            """
+        ).bindparams(bindparam("outlet_ids", expanding=True)),
+        {"outlet_ids": outlet_ids},
+    )
+    return list(result.scalars().all())
+
+
+@router.patch("")
+async def update_device_outlets_bulk(
+    payload: DeviceOutletBulkUpdate,
+    x_user_id: Optional[UUID] = Header(None, alias="X-User-Id"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Set is_active on many outlets in one UPDATE, e.g. a workspace-wide kill switch.
+    Requires MEMBER or higher in the workspace, or in every workspace owning one
+    of the given outlets; outlets of devices outside a workspace are not updated.
+    Affected devices get one new outlet revision; returns the new outlet states.
     """
+    outlet_ids = list(set(payload.outlet_ids or ()))
+    if payload.workspace_id is not None:
+        await require_role(db, payload.workspace_id, x_user_id, "MEMBER")
+    else:
+        workspace_ids = await _outlet_workspaces(db, outlet_ids)
+        for workspace_id in workspace_ids:
+            await require_role(db, workspace_id, x_user_id, "MEMBER")
     try:
-        rows = (
-            db.execute(
+        if payload.workspace_id is not None:
+            result = await db.execute(
                 text(
                     """
-                    SELECT id, device_id, is_active, outlet_name
-                    FROM device_outlets
-                    WHERE device_id = :device_id
-                    ORDER BY outlet_name ASC
+                    UPDATE device_outlets AS o
+                    SET is_active = :is_active
+                    FROM devices AS d
+                    WHERE d.id = o.device_id
+                      AND d.workspace_id = :workspace_id
+                    RETURNING o.id, o.device_id, o.is_active, o.outlet_name
                     """
                 ),
-                {"device_id": device_id},
+                {"is_active": payload.is_active, "workspace_id": payload.workspace_id},
             )
-            .mappings()
-            .all()
-        )
-
-        return [
-            DeviceOutletRow(
-                id=row["id"],
-                device_id=row["device_id"],
-                is_active=row["is_active"],
-                outlet_name=row["outlet_name"],
+        elif workspace_ids:
+            # Limited to the workspaces checked above, in case an outlet's device moved since.
+            result = await db.execute(
+                text(
+                    """
+                    UPDATE device_outlets AS o
+                    SET is_active = :is_active
+                    FROM devices AS d
+                    WHERE d.id = o.device_id
+                      AND o.id IN :outlet_ids
+                      AND d.workspace_id IN :workspace_ids
+                    RETURNING o.id, o.device_id, o.is_active, o.outlet_name
+                    """
+                ).bindparams(bindparam("outlet_ids", expanding=True), bindparam("workspace_ids", expanding=True)),
+                {"is_active": payload.is_active, "outlet_ids": outlet_ids, "workspace_ids": workspace_ids},
             )
-            for row in rows
-        ]
+        else:
+            result = None
+        rows = result.mappings().all() if result is not None else []
+        revisions = await outlet_revisions.bump(db, (row["device_id"] for row in rows))
+
+        await db.commit()
     except Exception as e:
-        logger.exception("Failed to list device outlets")
+        logger.exception("Failed to bulk update device outlets")
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-
-class DeviceOutletUpdate(BaseModel):
-    is_active: bool
+    outlet_revisions.tracker.publish(revisions)
+
+    outlets = sorted(rows, key=lambda row: (str(row["device_id"]), row["outlet_name"]))
+    found = {row["id"] for row in rows}
+    return {
+        "updated": len(rows),
+        "outlets": [
+            {
+                "id": str(row["id"]),
+                "device_id": str(row["device_id"]),
+                "is_active": row["is_active"],
+                "outlet_name": row["outlet_name"],
+            }
+            for row in outlets
+        ],
+        "not_found": [str(outlet_id) for outlet_id in set(outlet_ids) - found],
+    }
 
 
 @router.patch("/{outlet_id}")
-def update_device_outlet(
+async def update_device_outlet(
     outlet_id: UUID = Path(..., description="Outlet UUID"),
     payload: DeviceOutletUpdate | None = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Toggle/update an outlet's is_active flag.
@@ -78,30 +197,30 @@ def update_device_outlet(
         if payload is None:
             raise HTTPException(status_code=400, detail="Missing body")
 
-        row = (
-            db.execute(
-                text(
-                    """
-                    UPDATE device_outlets
-                    SET is_active = :is_active
-                    WHERE id = :outlet_id
-                    RETURNING id, device_id, is_active, outlet_name
-                    """
-                ),
-                {
-                    "is_active": payload.is_active,
-                    "outlet_id": outlet_id,
-                },
-            )
-            .mappings()
-            .first()
+        result = await db.execute(
+            text(
+                """
+                UPDATE device_outlets
+                SET is_active = :is_active
+                WHERE id = :outlet_id
+                RETURNING id, device_id, is_active, outlet_name
+                """
+            ),
+            {
+                "is_active": payload.is_active,
+                "outlet_id": outlet_id,
+            },
         )
+        row = result.mappings().first()
+        revisions = await outlet_revisions.bump(db, [row["device_id"]]) if row else {}
 
-        db.commit()
+        await db.commit()
 
         if not row:
             raise HTTPException(status_code=404, detail="Outlet not found")
 
+        outlet_revisions.tracker.publish(revisions)
+
         return {
             "id": str(row["id"]),
             "device_id": str(row["device_id"]),
@@ -112,6 +231,6 @@ def update_device_outlet(
         raise
     except Exception as e:
         logger.exception("Failed to update device outlet")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
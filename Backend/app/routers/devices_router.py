@@ -2,12 +2,13 @@ import logging
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from pydantic import BaseModel, Field
 from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database import get_db
+from .. import pagination, serializers
+from ..database import get_async_db
 from ..permissions import require_role
 
 logger = logging.getLogger(__name__)
@@ -21,66 +22,74 @@ class DeviceCreate(BaseModel):
 
 
 @router.get("")
-def list_devices(
+async def list_devices(
+    response: Response,
     workspace_id: Optional[UUID] = Query(default=None),
+    limit: int = pagination.limit_query(),
+    cursor: Optional[str] = pagination.cursor_query(),
     x_user_id: Optional[UUID] = Header(None, alias="X-User-Id"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    """
+    Lists devices, newest first, one page at a time (see app/pagination.py).
+    """
     if workspace_id and x_user_id:
-        require_role(db, workspace_id, x_user_id, "VIEWER")
+        await require_role(db, workspace_id, x_user_id, "VIEWER")
+    after = pagination.decode_created_at_cursor(cursor)
+    keyset = "AND (created_at, id) < (:after_created_at, :after_id)" if after else ""
+    params = {"limit": limit + 1}
+    if after:
+        params.update(after_created_at=after[0], after_id=after[1])
     try:
         if workspace_id:
-            rows = db.execute(
+            result = await db.execute(
                 text(
-                    """
+                    f"""
                     SELECT id, workspace_id, device_name, status, last_seen_at, created_at
                     FROM devices
-                    WHERE workspace_id = :workspace_id
-                    ORDER BY created_at DESC
+                    WHERE workspace_id = :workspace_id {keyset}
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT :limit
                     """
                 ),
-                {"workspace_id": workspace_id},
-            ).mappings().all()
+                {"workspace_id": workspace_id, **params},
+            )
+            rows = result.mappings().all()
         else:
-            rows = db.execute(
+            result = await db.execute(
                 text(
-                    """
+                    f"""
                     SELECT id, workspace_id, device_name, status, last_seen_at, created_at
                     FROM devices
-                    ORDER BY created_at DESC
+                    WHERE TRUE {keyset}
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT :limit
                     """
-                )
-            ).mappings().all()
+                ),
+                params,
+            )
+            rows = result.mappings().all()
+        rows = pagination.page(response, rows, limit, pagination.created_at_key)
 
-        return [
-            {
-                "id": str(r["id"]),
-                "workspace_id": str(r["workspace_id"]),
-                "device_name": r["device_name"],
-                "status": r.get("status"),
-                "last_seen_at": r["last_seen_at"].isoformat() if r.get("last_seen_at") else None,
-                "created_at": r["created_at"].isoformat() if r.get("created_at") else None,
-            }
-            for r in rows
-        ]
+        return serializers.json_response([serializers.encode_device(r) for r in rows], response)
     except Exception as e:
         logger.exception("Failed to list devices")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("", status_code=201)
-def create_device(
+async def create_device(
     payload: DeviceCreate,
     x_user_id: Optional[UUID] = Header(None, alias="X-User-Id"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Creates a device (power strip) under a workspace.
     Requires OWNER or ADMIN in the workspace.
     """
-    require_role(db, payload.workspace_id, x_user_id, "ADMIN")
+    await require_role(db, payload.workspace_id, x_user_id, "ADMIN")
     try:
-        row = db.execute(
+        result = await db.execute(
             text(
                 """
                 INSERT INTO devices (workspace_id, device_name)
@@ -92,9 +101,10 @@ def create_device(
                 "workspace_id": payload.workspace_id,
                 "device_name": payload.device_name,
             },
-        ).mappings().first()
+        )
+        row = result.mappings().first()
 
-        db.commit()
+        await db.commit()
 
         if not row:
             raise HTTPException(status_code=500, detail="Device insert failed")
@@ -111,6 +121,6 @@ def create_device(
         raise
     except Exception as e:
         logger.exception("Failed to create device")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -0,0 +1,33 @@
+"""
+Internal operational endpoints (not used by the app or devices).
+If INTERNAL_API_TOKEN is set, callers must send it in the X-Internal-Token header.
+"""
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from ..database import POOL_SETTINGS, STATEMENT_TIMEOUT_MS, async_pool_stats, sync_pool_stats
+
+
+def require_internal_token(x_internal_token: Optional[str] = Header(None, alias="X-Internal-Token")):
+    expected = os.getenv("INTERNAL_API_TOKEN")
+    if expected and x_internal_token != expected:
+        raise HTTPException(status_code=403, detail="Invalid internal token")
+
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    dependencies=[Depends(require_internal_token)],
+)
+
+
+@router.get("/db-pool")
+async def get_db_pool_stats():
+    """Pool configuration and live counters for the sync and async engines."""
+    return {
+        "config": {**POOL_SETTINGS, "statement_timeout_ms": STATEMENT_TIMEOUT_MS},
+        "sync": sync_pool_stats.snapshot(),
+        "async": async_pool_stats.snapshot(),
+    }
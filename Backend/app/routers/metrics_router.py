@@ -0,0 +1,39 @@
+"""
+GET /metrics: Prometheus text exposition of request/DB metrics (see app/metrics.py)
+plus the pool, ingest buffer, cache and worker counters that /internal and
+/sensor-readings/stats report as JSON.
+Protected like /internal: if INTERNAL_API_TOKEN is set, send it as X-Internal-Token.
+"""
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from .. import alerts, dedup, ingest, latest_readings, metrics, permissions, presence, reading_stream, supabase_admin
+from ..database import async_pool_stats, sync_pool_stats
+from .internal_router import require_internal_token
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+router = APIRouter(
+    tags=["internal"],
+    dependencies=[Depends(require_internal_token)],
+)
+
+
+def _gauges() -> list[str]:
+    lines = []
+    lines += metrics.gauge_lines("db_pool", sync_pool_stats.snapshot(), {"engine": "sync"})
+    lines += metrics.gauge_lines("db_pool", async_pool_stats.snapshot(), {"engine": "async"})
+    lines += metrics.gauge_lines("ingest_buffer", ingest.buffer.stats())
+    lines += metrics.gauge_lines("cache", latest_readings.stats(), {"cache": "latest_readings"})
+    lines += metrics.gauge_lines("cache", permissions.role_cache_stats(), {"cache": "roles"})
+    lines += metrics.gauge_lines("cache", dedup.stats(), {"cache": "dedup"})
+    lines += metrics.gauge_lines("supabase_admin", supabase_admin.stats())
+    lines += metrics.gauge_lines("presence", presence.tracker.stats())
+    lines += metrics.gauge_lines("reading_stream", reading_stream.broker.stats())
+    lines += metrics.gauge_lines("alerts", alerts.engine.stats())
+    return lines
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(metrics.render(_gauges()), media_type=CONTENT_TYPE)
@@ -5,9 +5,9 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
 from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database import get_db
+from ..database import get_async_db
 
 logger = logging.getLogger(__name__)
 
@@ -25,10 +25,10 @@ class ProfileCreate(BaseModel):
 
 
 @router.get("/{user_id}", response_model=ProfileOut)
-def get_profile(user_id: UUID, db: Session = Depends(get_db)):
+async def get_profile(user_id: UUID, db: AsyncSession = Depends(get_async_db)):
     """Fetch a user's profile by their auth user id."""
     try:
-        row = db.execute(
+        result = await db.execute(
             text(
                 """
                 SELECT user_id, display_name, created_at
@@ -37,7 +37,8 @@ def get_profile(user_id: UUID, db: Session = Depends(get_db)):
                 """
             ),
             {"user_id": user_id},
-        ).mappings().first()
+        )
+        row = result.mappings().first()
 
         if not row:
             raise HTTPException(status_code=404, detail="Profile not found")
@@ -55,14 +56,14 @@ def get_profile(user_id: UUID, db: Session = Depends(get_db)):
 
 
 @router.post("/{user_id}", status_code=201, response_model=ProfileOut)
-def upsert_profile(
+async def upsert_profile(
     user_id: UUID,
     payload: ProfileCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Create or update a user's profile (display_name)."""
     try:
-        row = db.execute(
+        result = await db.execute(
             text(
                 """
                 INSERT INTO profiles (user_id, display_name)
@@ -73,9 +74,10 @@ def upsert_profile(
                 """
             ),
             {"user_id": user_id, "display_name": payload.display_name},
-        ).mappings().first()
+        )
+        row = result.mappings().first()
 
-        db.commit()
+        await db.commit()
 
         if not row:
             raise HTTPException(status_code=500, detail="Failed to upsert profile")
@@ -86,9 +88,9 @@ def upsert_profile(
             "created_at": row["created_at"].isoformat() if row.get("created_at") else None,
         }
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
         logger.exception("Failed to upsert profile")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
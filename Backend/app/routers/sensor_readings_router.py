@@ -1,21 +1,74 @@
 """
 POST /sensor-readings for water (and other) sensor readings.
 Matches Supabase sensor_readings table: id (uuid), device_id (uuid), sensor_type, value, unit, raw, created_at.
+POST /sensor-readings/batch writes many readings in a single multi-row insert.
+POST /sensor-readings/frame stores every sensor of one device sample in one transaction.
+POST /sensor-readings/packed accepts the compact binary frames of app/packed_readings.py.
+With SENSOR_INGEST_MODE=buffered, POST /sensor-readings queues into the write-behind
+buffer (see app/ingest.py) and answers 202 before the row is committed; the
+reading reaches /latest, the stream and alerts once its batch is committed.
+GET /sensor-readings/stream pushes new readings to clients as Server-Sent Events.
+GET /sensor-readings/range returns min/max/avg/count/last per time bucket.
+GET /sensor-readings/export streams a workspace's readings as CSV or NDJSON.
+POST /sensor-readings/backtest replays candidate alert rules over a device's history.
 """
+import asyncio
+import csv
+import io
+import json
 import logging
+import os
+import re
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
 from typing import Any, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel, Field, ConfigDict
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ConfigDict, ValidationError, field_validator
+from sqlalchemy import column, func, select, table
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database import get_db
+from .. import (
+    alerts,
+    backtest,
+    dedup,
+    ingest,
+    latest_readings,
+    packed_readings,
+    presence,
+    reading_stream,
+    rollups,
+    serializers,
+)
+from ..cache import MISSING
+from ..database import SessionLocal, get_async_db
 from ..models import SensorReading, SensorType
+from ..permissions import require_role
 
 router = APIRouter(prefix="/sensor-readings", tags=["sensor-readings"])
 logger = logging.getLogger(__name__)
 
+# Upper bound on readings accepted by a single POST /sensor-readings/batch.
+MAX_BATCH_SIZE = 1000
+
+# Upper bound on buckets returned by GET /sensor-readings/range.
+MAX_RANGE_BUCKETS = 10000
+
+# Rows fetched per round trip from the server-side cursor used by exports.
+EXPORT_CHUNK_ROWS = int(os.getenv("SENSOR_EXPORT_CHUNK_ROWS", "5000"))
+
+# How far a device-supplied created_at may run ahead of server time. Later rows
+# would land in the default partition and block creating their own partition.
+MAX_FUTURE_SKEW_SECONDS = float(os.getenv("INGEST_MAX_FUTURE_SKEW_SECONDS", "300"))
+
+# Seconds between SSE keep-alive comments on an idle stream.
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
 
 class SensorReadingCreate(BaseModel):
     device_id: UUID
@@ -23,74 +76,689 @@ class SensorReadingCreate(BaseModel):
     value: float = Field(..., description="Numeric reading value")
     unit: Optional[str] = None
     raw: Optional[dict[str, Any]] = None
+    created_at: Optional[datetime] = Field(
+        default=None,
+        description=(
+            "Device-supplied sample time. Naive values are treated as UTC; defaults to server time. "
+            "Rejected if more than INGEST_MAX_FUTURE_SKEW_SECONDS ahead of server time."
+        ),
+    )
+    seq: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Device sequence number; a retry with the same (device_id, sensor_type, seq) is not stored twice.",
+    )
 
     model_config = ConfigDict(use_enum_values=True)
 
+    @field_validator("created_at")
+    @classmethod
+    def not_in_future(cls, value: Optional[datetime]) -> Optional[datetime]:
+        return _check_not_future(value)
+
+
+class SensorFrameReading(BaseModel):
+    sensor_type: SensorType
+    value: float = Field(..., description="Numeric reading value")
+    unit: Optional[str] = None
+    raw: Optional[dict[str, Any]] = None
+
+    model_config = ConfigDict(use_enum_values=True)
+
+
+class SensorFrameCreate(BaseModel):
+    """All sensor values sampled by one device at one instant."""
+
+    device_id: UUID
+    created_at: Optional[datetime] = Field(
+        default=None,
+        description=(
+            "Device-supplied sample time shared by every reading. Naive values are treated as UTC. "
+            "Rejected if more than INGEST_MAX_FUTURE_SKEW_SECONDS ahead of server time."
+        ),
+    )
+    seq: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Device sequence number of the frame; a retried frame is not stored twice.",
+    )
+    readings: list[SensorFrameReading] = Field(..., min_length=1, max_length=len(SensorType))
+
+    @field_validator("readings")
+    @classmethod
+    def unique_sensor_types(cls, readings: list[SensorFrameReading]) -> list[SensorFrameReading]:
+        seen = set()
+        for reading in readings:
+            if reading.sensor_type in seen:
+                raise ValueError(f"Duplicate sensor_type {reading.sensor_type!r} in frame")
+            seen.add(reading.sensor_type)
+        return readings
+
+    @field_validator("created_at")
+    @classmethod
+    def not_in_future(cls, value: Optional[datetime]) -> Optional[datetime]:
+        return _check_not_future(value)
+
+
+def _latest_created_at() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=MAX_FUTURE_SKEW_SECONDS)
+
+
+def _check_not_future(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and _as_utc(value) > _latest_created_at():
+        raise ValueError(f"created_at is more than {MAX_FUTURE_SKEW_SECONDS:g}s ahead of server time")
+    return value
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _reading_row(payload: SensorReadingCreate, now: datetime) -> dict[str, Any]:
+    """Build an insertable sensor_readings row with server-generated id."""
+    row = {
+        "id": uuid.uuid4(),
+        "device_id": payload.device_id,
+        "sensor_type": payload.sensor_type,
+        "value": payload.value,
+        "unit": payload.unit,
+        "raw": payload.raw,
+        "created_at": _as_utc(payload.created_at) if payload.created_at else now,
+    }
+    if payload.seq is not None:
+        row["seq"] = payload.seq
+    return row
+
+
+def _reading_out(row: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "id": str(row["id"]),
+        "device_id": str(row["device_id"]),
+        "sensor_type": row["sensor_type"],
+        "value": float(row["value"]),
+        "unit": row["unit"],
+        "raw": row["raw"],
+        "created_at": row["created_at"].isoformat() if row["created_at"] else None,
+    }
+
+
+def _after_ingest(rows: list[dict[str, Any]]) -> None:
+    """Propagate freshly written readings to in-process consumers."""
+    if presence.PRESENCE_ENABLED and rows:
+        presence.tracker.touch({row["device_id"] for row in rows})
+    for row in rows:
+        reading = _reading_out(row)
+        latest_readings.record(row["device_id"], row["sensor_type"], row["created_at"], reading)
+        reading_stream.broker.publish(row["device_id"], reading)
+        if alerts.ALERTS_ENABLED:
+            alerts.engine.evaluate(row["device_id"], row["sensor_type"], float(row["value"]), row["created_at"])
+
+
+# Buffered rows are fanned out by the flusher thread once their batch commits.
+ingest.buffer.on_written = _after_ingest
+
+
+async def _store_readings(
+    db: AsyncSession,
+    rows: list[dict[str, Any]],
+    response: Response,
+    buffered: Optional[bool] = None,
+) -> list[dict[str, Any]]:
+    """
+    Write rows in one transaction and fan the new ones out in-process, or queue
+    them in buffered ingest mode (202, or 429 when the buffer is full), in which
+    case the flusher fans them out after committing.
+
+    Returns one reading per row. Rows whose (device_id, sensor_type, seq) was
+    already stored get the original reading back and are not written again;
+    a request made only of replays answers 200.
+    """
+    if buffered is None:
+        buffered = ingest.BUFFERED_INGEST
+    fresh, stored = dedup.split(rows)
+    written: list[dict[str, Any]] = []
+    if fresh and buffered:
+        if not ingest.buffer.offer_many(fresh):
+            raise HTTPException(
+                status_code=429,
+                detail="Ingest buffer is full, retry later",
+                headers={"Retry-After": "1"},
+            )
+        written = fresh
+        response.status_code = 202
+    elif fresh:
+        try:
+            written, duplicates = await dedup.claim_async(db, fresh)
+            await ingest.insert_readings_async(db, written)
+            originals = await dedup.originals_async(db, duplicates)
+            await db.commit()
+            rollups.mark_written(written)
+        except Exception as e:
+            logger.exception("Failed to store %d sensor readings", len(fresh))
+            await db.rollback()
+            raise HTTPException(status_code=500, detail=str(e))
+        for row in fresh:
+            original = originals.get(dedup.key(row)) if dedup.is_keyed(row) else None
+            if original:
+                merged = {**row, **{k: v for k, v in original.items() if v is not None}}
+                stored[dedup.key(row)] = _reading_out(merged)
+                dedup.remember(dedup.key(row), stored[dedup.key(row)])
+
+    for row in written:
+        if dedup.is_keyed(row):
+            stored[dedup.key(row)] = _reading_out(row)
+            dedup.remember(dedup.key(row), stored[dedup.key(row)])
+    if not buffered:
+        _after_ingest(written)
+    if not written:
+        response.status_code = 200
+    return [stored[dedup.key(row)] if dedup.is_keyed(row) else _reading_out(row) for row in rows]
+
 
 @router.post("", status_code=201)
-def create_sensor_reading(payload: SensorReadingCreate, db: Session = Depends(get_db)):
-    """Create a water (or other) sensor reading. id and created_at are set by the server."""
+async def create_sensor_reading(
+    payload: SensorReadingCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Create a water (or other) sensor reading. id is set by the server; created_at defaults to now.
+    In buffered ingest mode the reading is queued and 202 is returned; 429 means the buffer is full.
+    A retry carrying an already stored seq returns the original reading with 200.
+    """
+    row = _reading_row(payload, datetime.now(timezone.utc))
+    readings = await _store_readings(db, [row], response)
+    return readings[0]
+
+
+@router.post("/frame", status_code=201)
+async def create_sensor_frame(
+    payload: SensorFrameCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Store one multi-sensor sample (e.g. water, smoke and temp) from a device.
+    All readings share created_at and are written in one transaction and fanned out in one pass.
+    """
+    created_at = _as_utc(payload.created_at) if payload.created_at else datetime.now(timezone.utc)
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "device_id": payload.device_id,
+            "sensor_type": reading.sensor_type,
+            "value": reading.value,
+            "unit": reading.unit,
+            "raw": reading.raw,
+            "created_at": created_at,
+            **({"seq": payload.seq} if payload.seq is not None else {}),
+        }
+        for reading in payload.readings
+    ]
+    return await _store_readings(db, rows, response)
+
+
+@router.post(
+    "/packed",
+    status_code=201,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {packed_readings.CONTENT_TYPE: {"schema": {"type": "string", "format": "binary"}}},
+        }
+    },
+)
+async def create_sensor_readings_packed(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Ingest one or more fixed-size binary frames (see app/packed_readings.py).
+    Skips Pydantic entirely; the response only reports how many readings were accepted.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type != packed_readings.CONTENT_TYPE:
+        raise HTTPException(status_code=415, detail=f"Expected {packed_readings.CONTENT_TYPE}")
+    body = await request.body()
+    if len(body) > MAX_BATCH_SIZE * packed_readings.FRAME.size:
+        raise HTTPException(status_code=413, detail=f"Too many frames (max {MAX_BATCH_SIZE})")
     try:
-        row = SensorReading(
-            device_id=payload.device_id,
-            sensor_type=payload.sensor_type,
-            value=payload.value,
-            unit=payload.unit,
-            raw=payload.raw,
+        rows = packed_readings.decode_frames(body, datetime.now(timezone.utc), _latest_created_at())
+    except packed_readings.PackedFrameError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await _store_readings(db, rows, response)
+    return {"accepted": len(rows)}
+
+
+@router.post("/batch", status_code=201)
+async def create_sensor_readings_batch(
+    response: Response,
+    items: list[Any] = Body(..., description="Array of SensorReadingCreate objects"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Create many sensor readings in one transaction.
+
+    Each item is validated on its own; invalid items are reported in `results`
+    and skipped, valid ones are written with a single multi-row INSERT.
+    Items without `created_at` share one server timestamp. Items whose seq was
+    already stored are reported as "duplicate" with the original id.
+    """
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large ({len(items)} items, max {MAX_BATCH_SIZE})",
         )
-        db.add(row)
-        db.commit()
-        db.refresh(row)
-        return {
-            "id": str(row.id),
-            "device_id": str(row.device_id),
-            "sensor_type": row.sensor_type.value if hasattr(row.sensor_type, "value") else row.sensor_type,
-            "value": float(row.value),
-            "unit": row.unit,
-            "raw": row.raw,
-            "created_at": row.created_at.isoformat() if row.created_at else None,
-        }
-    except Exception as e:
-        logger.exception("Failed to create sensor reading")
-        db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
+
+    now = datetime.now(timezone.utc)
+    rows: list[dict[str, Any]] = []
+    results: list[dict[str, Any]] = []
+    row_results: list[dict[str, Any]] = []
+    for index, item in enumerate(items):
+        try:
+            payload = SensorReadingCreate.model_validate(item)
+        except ValidationError as e:
+            results.append(
+                {
+                    "index": index,
+                    "status": "invalid",
+                    "errors": e.errors(include_url=False, include_context=False, include_input=False),
+                }
+            )
+            continue
+
+        row = _reading_row(payload, now)
+        rows.append(row)
+        row_results.append({"index": index, "status": "created", "id": str(row["id"])})
+        results.append(row_results[-1])
+
+    duplicates = 0
+    if rows:
+        readings = await _store_readings(db, rows, response, buffered=False)
+        for result, reading in zip(row_results, readings):
+            if reading["id"] != result["id"]:
+                result.update(status="duplicate", id=reading["id"])
+                duplicates += 1
+
+    return {
+        "created": len(rows) - duplicates,
+        "duplicate": duplicates,
+        "invalid": len(items) - len(rows),
+        "results": results,
+    }
+
+
+@router.get("/stats")
+async def get_ingest_stats():
+    """Ingest mode, write-behind buffer, latest-reading and dedup caches, stream, presence and alert engine counters."""
+    return {
+        "ingest_mode": ingest.INGEST_MODE,
+        "ingest_buffer": ingest.buffer.stats(),
+        "latest_cache": latest_readings.stats(),
+        "dedup_cache": dedup.stats(),
+        "stream": reading_stream.broker.stats(),
+        "presence": presence.tracker.stats(),
+        "alerts": alerts.engine.stats(),
+    }
+
+
+def _sse_event(seq: int, reading: dict[str, Any]) -> str:
+    return f"id: {seq}\nevent: reading\ndata: {json.dumps(reading)}\n\n"
+
+
+@router.get("/stream")
+async def stream_sensor_readings(
+    request: Request,
+    device_id: UUID = Query(..., description="Device UUID"),
+    sensor_type: Optional[SensorType] = Query(default=None, description="Only this sensor type; all if omitted"),
+    last_event_id: Optional[int] = Query(default=None, description="Resume after this event id"),
+    last_event_id_header: Optional[int] = Header(default=None, alias="Last-Event-ID"),
+):
+    """
+    Server-Sent Events stream of readings for a device as they are ingested.
+
+    Each event carries the reading JSON and an id; reconnecting with
+    `Last-Event-ID` (or `?last_event_id=`) replays retained events after it.
+    Idle streams get a comment heartbeat every SSE_HEARTBEAT_SECONDS.
+    """
+    resume_after = last_event_id if last_event_id is not None else last_event_id_header
+    sub, backlog = reading_stream.broker.subscribe(
+        device_id,
+        sensor_type.value if sensor_type else None,
+        resume_after,
+    )
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            for seq, reading in backlog:
+                yield _sse_event(seq, reading)
+            while True:
+                try:
+                    seq, reading = await asyncio.wait_for(sub.queue.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": heartbeat\n\n"
+                    continue
+                yield _sse_event(seq, reading)
+        finally:
+            reading_stream.broker.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/latest")
-def get_latest_sensor_reading(
+async def get_latest_sensor_reading(
     device_id: UUID = Query(..., description="Device UUID"),
     sensor_type: SensorType = Query(SensorType.WATER),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Return the latest sensor_readings row for a device and sensor_type.
     Used by the demo app to poll the water sensor.
+    Served from the in-process latest-reading cache; the database is only queried on a miss.
     """
+    cached = latest_readings.lookup(device_id, sensor_type.value)
+    if cached is not MISSING:
+        return serializers.json_response(cached)
+
     try:
-        row = (
-            db.query(SensorReading)
-            .filter(
+        result = await db.execute(
+            select(SensorReading)
+            .where(
                 SensorReading.device_id == device_id,
                 SensorReading.sensor_type == sensor_type,
             )
             .order_by(SensorReading.created_at.desc())
-            .first()
+            .limit(1)
         )
+        row = result.scalars().first()
 
         if not row:
-            return None
+            latest_readings.warm(device_id, sensor_type.value, None, None)
+            return serializers.json_response(None)
+
+        reading = latest_readings.reading_from_row(row)
+        latest_readings.warm(device_id, sensor_type.value, row.created_at, reading)
+        return serializers.json_response(reading)
+    except Exception as e:
+        logger.exception("Failed to fetch latest sensor reading")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+_BUCKET_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def _parse_bucket(bucket: str) -> int:
+    """Parse "30s", "5m", "1h", "1d" or a plain number of seconds."""
+    match = re.fullmatch(r"(\d+)([smhd]?)", bucket.strip().lower())
+    if not match or int(match.group(1)) == 0:
+        raise HTTPException(status_code=400, detail="bucket must look like 30s, 5m, 1h, 1d or seconds")
+    return int(match.group(1)) * _BUCKET_UNITS[match.group(2) or "s"]
+
+
+async def _raw_buckets(db: AsyncSession, device_id: UUID, sensor_type: SensorType, start: datetime, end: datetime, bucket_seconds: int):
+    r = SensorReading
+    bucket = rollups.bucket_start(r.created_at, bucket_seconds)
+    result = await db.execute(
+        select(
+            bucket.label("bucket_start"),
+            func.min(r.value).label("min"),
+            func.max(r.value).label("max"),
+            func.sum(r.value).label("sum"),
+            func.count().label("count"),
+            array_agg(aggregate_order_by(r.value, r.created_at.desc()))[1].label("last"),
+        )
+        .where(
+            r.device_id == device_id,
+            r.sensor_type == sensor_type,
+            r.created_at >= start,
+            r.created_at < end,
+        )
+        .group_by(bucket)
+        .order_by(bucket)
+    )
+    return result.mappings().all()
+
+
+async def _rollup_buckets(db: AsyncSession, table, device_id: UUID, sensor_type: SensorType, start: datetime, end: datetime, bucket_seconds: int):
+    bucket = rollups.bucket_start(table.bucket_start, bucket_seconds)
+    result = await db.execute(
+        select(
+            bucket.label("bucket_start"),
+            func.min(table.min_value).label("min"),
+            func.max(table.max_value).label("max"),
+            func.sum(table.sum_value).label("sum"),
+            func.sum(table.count).label("count"),
+            array_agg(aggregate_order_by(table.last_value, table.last_at.desc()))[1].label("last"),
+        )
+        .where(
+            table.device_id == device_id,
+            table.sensor_type == sensor_type,
+            table.bucket_start >= start,
+            table.bucket_start < end,
+        )
+        .group_by(bucket)
+        .order_by(bucket)
+    )
+    return result.mappings().all()
+
+
+@router.get("/range")
+async def get_sensor_reading_range(
+    device_id: UUID = Query(..., description="Device UUID"),
+    sensor_type: SensorType = Query(SensorType.WATER),
+    from_: datetime = Query(..., alias="from", description="Range start (inclusive)"),
+    to: Optional[datetime] = Query(default=None, description="Range end (exclusive); defaults to now"),
+    bucket: str = Query("1m", description="Bucket width: 30s, 5m, 1h, 1d or seconds"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Aggregate readings into epoch-aligned time buckets (min/max/avg/count/last per bucket).
+
+    `from` is floored to a bucket boundary. Bucket widths that are whole minutes
+    or hours are served from the rollup tables up to the last rollup run, and
+    from raw readings after it; other widths always aggregate raw readings.
+    """
+    bucket_seconds = _parse_bucket(bucket)
+    start = rollups.floor_to_bucket(_as_utc(from_), bucket_seconds)
+    end = _as_utc(to) if to else datetime.now(timezone.utc)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="`to` must be after `from`")
+    if (end - start).total_seconds() / bucket_seconds > MAX_RANGE_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range spans more than {MAX_RANGE_BUCKETS} buckets; use a wider bucket",
+        )
+
+    try:
+        rows = []
+        source = "raw"
+        table = rollups.rollup_source(bucket_seconds)
+        split = start
+        if table is not None:
+            split = min(end, rollups.floor_to_bucket(rollups.watermark, bucket_seconds))
+        if split > start:
+            rows.extend(await _rollup_buckets(db, table, device_id, sensor_type, start, split, bucket_seconds))
+            source = table.__tablename__ if split >= end else f"{table.__tablename__}+raw"
+        if end > split:
+            rows.extend(await _raw_buckets(db, device_id, sensor_type, split, end, bucket_seconds))
 
         return {
-            "id": str(row.id),
-            "device_id": str(row.device_id),
-            "sensor_type": row.sensor_type.value
-            if hasattr(row.sensor_type, "value")
-            else row.sensor_type,
-            "value": float(row.value),
-            "unit": row.unit,
-            "raw": row.raw,
-            "created_at": row.created_at.isoformat() if row.created_at else None,
+            "device_id": str(device_id),
+            "sensor_type": sensor_type.value,
+            "bucket_seconds": bucket_seconds,
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "source": source,
+            "buckets": [
+                {
+                    "start": r["bucket_start"].isoformat(),
+                    "min": float(r["min"]),
+                    "max": float(r["max"]),
+                    "avg": float(r["sum"]) / r["count"],
+                    "count": int(r["count"]),
+                    "last": float(r["last"]),
+                }
+                for r in rows
+            ],
         }
     except Exception as e:
-        logger.exception("Failed to fetch latest sensor reading")
+        logger.exception("Failed to aggregate sensor readings")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+_devices = table("devices", column("id"), column("workspace_id"))
+
+EXPORT_COLUMNS = ["id", "device_id", "sensor_type", "value", "unit", "raw", "created_at"]
+
+
+def _export_partitions(workspace_id: UUID, start: Optional[datetime], end: Optional[datetime]):
+    """
+    Yield lists of export rows for a workspace, read through a server-side cursor
+    so only EXPORT_CHUNK_ROWS rows are in memory at a time.
+    Uses its own (sync) session because the response body outlives the request
+    dependency; StreamingResponse iterates it in the threadpool.
+    """
+    r = SensorReading
+    stmt = (
+        select(r.id, r.device_id, r.sensor_type, r.value, r.unit, r.raw, r.created_at)
+        .where(r.device_id.in_(select(_devices.c.id).where(_devices.c.workspace_id == workspace_id)))
+        .order_by(r.created_at)
+    )
+    if start is not None:
+        stmt = stmt.where(r.created_at >= start)
+    if end is not None:
+        stmt = stmt.where(r.created_at < end)
+
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt, execution_options={"yield_per": EXPORT_CHUNK_ROWS})
+        for partition in result.partitions():
+            yield [
+                (
+                    str(row.id),
+                    str(row.device_id),
+                    getattr(row.sensor_type, "value", row.sensor_type),
+                    float(row.value),
+                    row.unit,
+                    row.raw,
+                    row.created_at.isoformat() if row.created_at else None,
+                )
+                for row in partition
+            ]
+    finally:
+        db.close()
+
+
+def _encode_csv(partitions):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in partitions:
+        for row in rows:
+            raw = row[5]
+            writer.writerow(row[:5] + (json.dumps(raw) if raw is not None else None,) + row[6:])
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    # Header only when there were no rows.
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def _encode_ndjson(partitions):
+    for rows in partitions:
+        yield "".join(json.dumps(dict(zip(EXPORT_COLUMNS, row))) + "\n" for row in rows)
+
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@router.get("/export")
+async def export_sensor_readings(
+    workspace_id: UUID = Query(..., description="Workspace UUID"),
+    from_: Optional[datetime] = Query(default=None, alias="from", description="Range start (inclusive)"),
+    to: Optional[datetime] = Query(default=None, description="Range end (exclusive)"),
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    gzip: bool = Query(False, description="Compress the export on the fly"),
+    x_user_id: Optional[UUID] = Header(None, alias="X-User-Id"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Stream every reading of every device in a workspace, oldest first.
+    Memory stays flat regardless of row count. Requires workspace membership (any role).
+    """
+    await require_role(db, workspace_id, x_user_id, "VIEWER")
+    start = _as_utc(from_) if from_ else None
+    end = _as_utc(to) if to else None
+
+    partitions = _export_partitions(workspace_id, start, end)
+    chunks = _encode_csv(partitions) if format == "csv" else _encode_ndjson(partitions)
+    filename = f"sensor-readings-{workspace_id}.{format}"
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    if gzip:
+        chunks = _gzip_chunks(chunks)
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+class BacktestRule(BaseModel):
+    comparator: str = Field(..., description="One of >, >=, <, <=, ==, != (or gt, gte, lt, lte, eq, ne)")
+    threshold_value: float
+    duration_seconds: int = Field(default=0, ge=0)
+
+    @field_validator("comparator")
+    @classmethod
+    def _known_comparator(cls, value: str) -> str:
+        if value.strip().lower() not in alerts.COMPARATORS:
+            raise ValueError(f"unknown comparator {value!r}")
+        return value
+
+
+class BacktestRequest(BaseModel):
+    device_id: UUID
+    sensor_type: SensorType
+    from_: Optional[datetime] = Field(default=None, alias="from")
+    to: Optional[datetime] = None
+    rules: list[BacktestRule] = Field(..., min_length=1, max_length=100)
+
+
+@router.post("/backtest")
+async def backtest_alert_rules(payload: BacktestRequest):
+    """
+    Report how many alerts each candidate rule would have fired over a device's
+    readings in [from, to). Runs in the threadpool; see app/backtest.py.
+    """
+    try:
+        return await run_in_threadpool(
+            backtest.run_backtest,
+            payload.device_id,
+            payload.sensor_type,
+            [rule.model_dump() for rule in payload.rules],
+            _as_utc(payload.from_) if payload.from_ else None,
+            _as_utc(payload.to) if payload.to else None,
+        )
+    except Exception as e:
+        logger.exception("Failed to backtest alert rules")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,17 +1,19 @@
+import asyncio
 import logging
 import os
 from enum import Enum
 from typing import Optional
 from uuid import UUID
 
-import httpx
-from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from pydantic import BaseModel, EmailStr, Field
 from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database import get_db
-from ..permissions import require_role
+from .. import latest_readings, outlet_revisions, pagination, serializers, supabase_admin
+from ..database import get_async_db
+from ..models import SensorType
+from ..permissions import invalidate_role, invalidate_workspace, require_role
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +44,17 @@ class WorkspaceMemberCreateByEmail(BaseModel):
     role: MemberRole = MemberRole.MEMBER
 
 
+# Upper bound on invites accepted by one POST .../members/by-email/bulk.
+MAX_BULK_INVITES = 200
+
+# Supabase admin lookups run concurrently per bulk invite, at most this many at a time.
+INVITE_LOOKUP_CONCURRENCY = int(os.getenv("INVITE_LOOKUP_CONCURRENCY", "8"))
+
+
+class WorkspaceMembersCreateByEmail(BaseModel):
+    members: list[WorkspaceMemberCreateByEmail] = Field(..., min_length=1, max_length=MAX_BULK_INVITES)
+
+
 class WorkspaceMemberOut(BaseModel):
     workspace_id: UUID
     user_id: UUID
@@ -50,10 +63,13 @@ class WorkspaceMemberOut(BaseModel):
 
 
 @router.get("", response_model=list[WorkspaceOut])
-def list_workspaces(
+async def list_workspaces(
+    response: Response,
     created_by: Optional[UUID] = Query(default=None),
     member_user_id: Optional[UUID] = Query(default=None),
-    db: Session = Depends(get_db),
+    limit: int = pagination.limit_query(),
+    cursor: Optional[str] = pagination.cursor_query(),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Lists workspaces.
@@ -64,67 +80,77 @@ def list_workspaces(
       creator.
     - Else if `created_by` is provided, filters directly on that column.
     - Else returns all workspaces.
+
+    Newest first, one page at a time (see app/pagination.py).
     """
+    after = pagination.decode_created_at_cursor(cursor)
+    params = {"limit": limit + 1}
+    if after:
+        params.update(after_created_at=after[0], after_id=after[1])
     try:
         if member_user_id:
-            rows = db.execute(
+            keyset = "AND (w.created_at, w.id) < (:after_created_at, :after_id)" if after else ""
+            result = await db.execute(
                 text(
-                    """
+                    f"""
                     SELECT DISTINCT w.id, w.name, w.created_by, w.created_at
                     FROM workspaces w
                     LEFT JOIN workspace_members wm
                       ON wm.workspace_id = w.id
-                    WHERE wm.user_id = :member_user_id
-                       OR w.created_by = :member_user_id
-                    ORDER BY w.created_at DESC
+                    WHERE (wm.user_id = :member_user_id
+                       OR w.created_by = :member_user_id) {keyset}
+                    ORDER BY w.created_at DESC, w.id DESC
+                    LIMIT :limit
                     """
                 ),
-                {"member_user_id": member_user_id},
-            ).mappings().all()
+                {"member_user_id": member_user_id, **params},
+            )
+            rows = result.mappings().all()
         elif created_by:
-            rows = db.execute(
+            keyset = "AND (created_at, id) < (:after_created_at, :after_id)" if after else ""
+            result = await db.execute(
                 text(
-                    """
+                    f"""
                     SELECT id, name, created_by, created_at
                     FROM workspaces
-                    WHERE created_by = :created_by
-                    ORDER BY created_at DESC
+                    WHERE created_by = :created_by {keyset}
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT :limit
                     """
                 ),
-                {"created_by": created_by},
-            ).mappings().all()
+                {"created_by": created_by, **params},
+            )
+            rows = result.mappings().all()
         else:
-            rows = db.execute(
+            keyset = "WHERE (created_at, id) < (:after_created_at, :after_id)" if after else ""
+            result = await db.execute(
                 text(
-                    """
+                    f"""
                     SELECT id, name, created_by, created_at
                     FROM workspaces
-                    ORDER BY created_at DESC
+                    {keyset}
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT :limit
                     """
-                )
-            ).mappings().all()
+                ),
+                params,
+            )
+            rows = result.mappings().all()
+        rows = pagination.page(response, rows, limit, pagination.created_at_key)
 
-        return [
-            {
-                "id": r["id"],
-                "name": r["name"],
-                "created_by": r["created_by"],
-                "created_at": r["created_at"].isoformat() if r["created_at"] else None,
-            }
-            for r in rows
-        ]
+        return serializers.json_response([serializers.encode_workspace(r) for r in rows], response)
     except Exception as e:
         logger.exception("Failed to list workspaces")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("", status_code=201, response_model=WorkspaceOut)
-def create_workspace(payload: WorkspaceCreate, db: Session = Depends(get_db)):
+async def create_workspace(payload: WorkspaceCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Creates a workspace. `created_at` defaults to now() in the DB.
     """
     try:
-        row = db.execute(
+        result = await db.execute(
             text(
                 """
                 INSERT INTO workspaces (name, created_by)
@@ -133,14 +159,15 @@ def create_workspace(payload: WorkspaceCreate, db: Session = Depends(get_db)):
                 """
             ),
             {"name": payload.name, "created_by": payload.created_by},
-        ).mappings().first()
+        )
+        row = result.mappings().first()
 
         if not row:
             raise HTTPException(status_code=500, detail="Workspace insert failed")
 
         # Ensure the creator is also recorded as a workspace member (OWNER)
         if payload.created_by:
-            db.execute(
+            await db.execute(
                 text(
                     """
                     INSERT INTO workspace_members (workspace_id, user_id, role)
@@ -156,7 +183,8 @@ def create_workspace(payload: WorkspaceCreate, db: Session = Depends(get_db)):
                 },
             )
 
-        db.commit()
+        await db.commit()
+        invalidate_workspace(row["id"])
 
         return {
             "id": row["id"],
@@ -165,11 +193,11 @@ def create_workspace(payload: WorkspaceCreate, db: Session = Depends(get_db)):
             "created_at": row["created_at"].isoformat() if row["created_at"] else None,
         }
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
         logger.exception("Failed to create workspace")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -180,22 +208,31 @@ class WorkspaceMemberWithProfile(BaseModel):
 
 
 @router.get("/{workspace_id}/members", response_model=list[WorkspaceMemberWithProfile])
-def list_workspace_members(
+async def list_workspace_members(
     workspace_id: UUID,
+    response: Response,
+    limit: int = pagination.limit_query(),
+    cursor: Optional[str] = pagination.cursor_query(),
     x_user_id: Optional[UUID] = Header(None, alias="X-User-Id"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     List workspace members with their display names (from profiles).
-    Requires workspace membership (any role).
+    Requires workspace membership (any role). Paged by user_id (see app/pagination.py).
     """
-    require_role(db, workspace_id, x_user_id, "VIEWER")
+    await require_role(db, workspace_id, x_user_id, "VIEWER")
+    after_user_id = pagination.decode_id_cursor(cursor)
+    member_keyset = "AND wm.user_id > :after_user_id" if after_user_id else ""
+    creator_keyset = "AND w.created_by > :after_user_id" if after_user_id else ""
+    params = {"workspace_id": workspace_id, "limit": limit + 1}
+    if after_user_id:
+        params["after_user_id"] = after_user_id
     try:
         # Always include workspace creator as OWNER (even if legacy data is missing
         # an explicit workspace_members row for them).
-        rows = db.execute(
+        result = await db.execute(
             text(
-                """
+                f"""
                 SELECT DISTINCT ON (t.user_id)
                     t.user_id,
                     t.role,
@@ -204,14 +241,14 @@ def list_workspace_members(
                     SELECT wm.user_id, wm.role, p.display_name
                     FROM workspace_members wm
                     LEFT JOIN profiles p ON p.user_id = wm.user_id
-                    WHERE wm.workspace_id = :workspace_id
+                    WHERE wm.workspace_id = :workspace_id {member_keyset}
 
                     UNION ALL
 
                     SELECT w.created_by AS user_id, 'OWNER' AS role, p.display_name
                     FROM workspaces w
                     LEFT JOIN profiles p ON p.user_id = w.created_by
-                    WHERE w.id = :workspace_id AND w.created_by IS NOT NULL
+                    WHERE w.id = :workspace_id AND w.created_by IS NOT NULL {creator_keyset}
                 ) t
                 ORDER BY
                     t.user_id,
@@ -222,180 +259,166 @@ def list_workspace_members(
                         WHEN 'VIEWER' THEN 1
                         ELSE 0
                     END DESC
+                LIMIT :limit
                 """
             ),
-            {"workspace_id": workspace_id},
-        ).mappings().all()
+            params,
+        )
+        rows = result.mappings().all()
+        rows = pagination.page(response, rows, limit, lambda r: (r["user_id"],))
 
-        return [
-            {
-                "user_id": r["user_id"],
-                "role": r["role"],
-                "display_name": r.get("display_name"),
-            }
-            for r in rows
-        ]
+        return serializers.json_response([serializers.encode_member(r) for r in rows], response)
     except Exception as e:
         logger.exception("Failed to list workspace members")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.delete("/{workspace_id}", status_code=204)
-def delete_workspace(
+async def delete_workspace(
     workspace_id: UUID,
     x_user_id: Optional[UUID] = Header(None, alias="X-User-Id"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Delete a workspace. Requires OWNER only."""
-    require_role(db, workspace_id, x_user_id, "OWNER")
+    await require_role(db, workspace_id, x_user_id, "OWNER")
     try:
-        db.execute(
+        await db.execute(
             text("DELETE FROM workspace_members WHERE workspace_id = :workspace_id"),
             {"workspace_id": workspace_id},
         )
-        db.execute(
+        await db.execute(
             text("DELETE FROM devices WHERE workspace_id = :workspace_id"),
             {"workspace_id": workspace_id},
         )
-        db.execute(
+        await db.execute(
             text("DELETE FROM workspaces WHERE id = :workspace_id"),
             {"workspace_id": workspace_id},
         )
-        db.commit()
+        await db.commit()
+        invalidate_workspace(workspace_id)
     except Exception as e:
         logger.exception("Failed to delete workspace")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/{workspace_id}/devices")
-def list_devices_for_workspace(
+async def list_devices_for_workspace(
     workspace_id: UUID,
+    response: Response,
+    limit: int = pagination.limit_query(),
+    cursor: Optional[str] = pagination.cursor_query(),
     x_user_id: Optional[UUID] = Header(None, alias="X-User-Id"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Convenience route to list devices under a workspace.
-    Requires workspace membership (any role).
+    Requires workspace membership (any role). Newest first, one page at a time.
     """
-    require_role(db, workspace_id, x_user_id, "VIEWER")
+    await require_role(db, workspace_id, x_user_id, "VIEWER")
+    after = pagination.decode_created_at_cursor(cursor)
+    keyset = "AND (created_at, id) < (:after_created_at, :after_id)" if after else ""
+    params = {"workspace_id": workspace_id, "limit": limit + 1}
+    if after:
+        params.update(after_created_at=after[0], after_id=after[1])
     try:
-        rows = db.execute(
+        result = await db.execute(
             text(
-                """
+                f"""
                 SELECT id, workspace_id, device_name, status, last_seen_at, created_at
                 FROM devices
-                WHERE workspace_id = :workspace_id
-                ORDER BY created_at DESC
+                WHERE workspace_id = :workspace_id {keyset}
+                ORDER BY created_at DESC, id DESC
+                LIMIT :limit
                 """
             ),
-            {"workspace_id": workspace_id},
-        ).mappings().all()
+            params,
+        )
+        rows = result.mappings().all()
+        rows = pagination.page(response, rows, limit, pagination.created_at_key)
 
-        return [
-            {
-                "id": str(r["id"]),
-                "workspace_id": str(r["workspace_id"]),
-                "device_name": r["device_name"],
-                "status": r.get("status"),
-                "last_seen_at": r["last_seen_at"].isoformat() if r.get("last_seen_at") else None,
-                "created_at": r["created_at"].isoformat() if r.get("created_at") else None,
-            }
-            for r in rows
-        ]
+        return serializers.json_response([serializers.encode_device(r) for r in rows], response)
     except Exception as e:
         logger.exception("Failed to list devices for workspace")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def _get_supabase_admin_client() -> tuple[str, str]:
-    """
-    Returns (base_url, service_role_key) for Supabase admin API.
+@router.get("/{workspace_id}/snapshot")
+async def get_workspace_snapshot(
+    workspace_id: UUID,
+    x_user_id: Optional[UUID] = Header(None, alias="X-User-Id"),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
-    base_url = os.getenv("SUPABASE_URL")
-    service_role_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-    if not base_url or not service_role_key:
-        raise RuntimeError("Supabase admin env vars are not configured")
-    # Normalize URL without trailing slash
-    base_url = base_url.rstrip("/")
-    return base_url, service_role_key
-
+    Everything a workspace dashboard shows, in one call: devices, their outlets
+    (with the outlet revision for long-polling) and the latest reading per sensor type.
+    Requires workspace membership (any role).
 
-def _lookup_user_id_by_email(email: str) -> UUID:
+    Built from one devices query, one outlets query, one outlet revisions query
+    and, for latest readings not in the in-memory cache, one LATERAL query,
+    independent of device count.
     """
-    Uses Supabase Admin API to resolve a user's auth UUID from their email.
-    """
-    base_url, service_role_key = _get_supabase_admin_client()
-    url = f"{base_url}/auth/v1/admin/users"
-    headers = {
-        "Authorization": f"Bearer {service_role_key}",
-        "apikey": service_role_key,
-    }
-
+    await require_role(db, workspace_id, x_user_id, "VIEWER")
     try:
-        with httpx.Client(timeout=10.0) as client:
-            resp = client.get(url, params={"email": email}, headers=headers)
-    except httpx.RequestError as exc:
-        logger.exception("Failed to contact Supabase admin API")
-        raise HTTPException(
-            status_code=502,
-            detail=f"Error contacting Supabase admin API: {exc}",
+        result = await db.execute(
+            text(
+                """
+                SELECT id, workspace_id, device_name, status, last_seen_at, created_at
+                FROM devices
+                WHERE workspace_id = :workspace_id
+                ORDER BY created_at DESC
+                """
+            ),
+            {"workspace_id": workspace_id},
         )
+        devices = result.mappings().all()
 
-    if resp.status_code != 200:
-        logger.error(
-            "Supabase admin API returned %s: %s", resp.status_code, resp.text
-        )
-        raise HTTPException(
-            status_code=502,
-            detail="Failed to lookup user by email in Supabase",
+        result = await db.execute(
+            text(
+                """
+                SELECT o.id, o.device_id, o.is_active, o.outlet_name
+                FROM device_outlets o
+                JOIN devices d ON d.id = o.device_id
+                WHERE d.workspace_id = :workspace_id
+                ORDER BY o.device_id, o.outlet_name ASC
+                """
+            ),
+            {"workspace_id": workspace_id},
         )
+        outlets_by_device: dict[UUID, list[dict]] = {}
+        for o in result.mappings().all():
+            outlets_by_device.setdefault(o["device_id"], []).append(serializers.encode_outlet(o))
 
-    data = resp.json()
-    users = data.get("users") if isinstance(data, dict) else data
-    if not users:
-        raise HTTPException(status_code=404, detail="User with that email not found")
-
-    # Be defensive: some Supabase deployments may ignore the email filter
-    # and return multiple users. Explicitly pick the one whose email matches.
-    user = None
-    for candidate in users:
-        candidate_email = candidate.get("email")
-        if candidate_email and candidate_email.lower() == email.lower():
-            user = candidate
-            break
-
-    if user is None:
-        logger.error("No Supabase user matched email=%s in response: %s", email, users)
-        raise HTTPException(status_code=404, detail="User with that email not found")
-    user_id = user.get("id")
-    if not user_id:
-        logger.error("Supabase user record missing 'id': %s", user)
-        raise HTTPException(
-            status_code=502,
-            detail="Supabase user record is missing id",
-        )
+        revisions = await outlet_revisions.current_many(db, [d["id"] for d in devices])
 
-    try:
-        return UUID(user_id)
-    except Exception as exc:  # noqa: BLE001
-        logger.exception("Invalid Supabase user id: %s", user_id)
-        raise HTTPException(
-            status_code=502,
-            detail=f"Supabase returned invalid user id: {exc}",
+        sensor_types = [t.value for t in SensorType]
+        latest = await latest_readings.lookup_many(
+            db, [(d["id"], sensor_type) for d in devices for sensor_type in sensor_types]
         )
 
+        snapshot = []
+        for d in devices:
+            device = serializers.encode_device(d)
+            device["outlets"] = outlets_by_device.get(d["id"], [])
+            device["outlets_revision"] = revisions.get(d["id"], 0)
+            device["latest"] = {sensor_type: latest.get((d["id"], sensor_type)) for sensor_type in sensor_types}
+            snapshot.append(device)
+        return serializers.json_response({"workspace_id": workspace_id, "devices": snapshot})
+    except Exception as e:
+        logger.exception("Failed to build workspace snapshot")
+        raise HTTPException(status_code=500, detail=str(e))
+
 
 @router.post(
     "/{workspace_id}/members/by-email",
     status_code=201,
     response_model=WorkspaceMemberOut,
 )
-def add_member_to_workspace_by_email(
+async def add_member_to_workspace_by_email(
     workspace_id: UUID,
     payload: WorkspaceMemberCreateByEmail,
     x_user_id: Optional[UUID] = Header(None, alias="X-User-Id"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Adds (or updates) a workspace member by resolving their email to a Supabase
@@ -403,17 +426,14 @@ def add_member_to_workspace_by_email(
     Requires OWNER or ADMIN. Only OWNER can assign OWNER or ADMIN roles.
     """
     if payload.role in (MemberRole.OWNER, MemberRole.ADMIN):
-        require_role(db, workspace_id, x_user_id, "OWNER")
+        await require_role(db, workspace_id, x_user_id, "OWNER")
     else:
-        require_role(db, workspace_id, x_user_id, "ADMIN")
-    try:
-        user_id = _lookup_user_id_by_email(payload.email)
-    except HTTPException:
-        # Bubble up user-facing HTTP exceptions (404, 502, etc.)
-        raise
+        await require_role(db, workspace_id, x_user_id, "ADMIN")
+    # Raises user-facing HTTP exceptions (404, 502, etc.)
+    user_id = await supabase_admin.lookup_user_id_by_email(payload.email)
 
     try:
-        row = db.execute(
+        result = await db.execute(
             text(
                 """
                 INSERT INTO workspace_members (workspace_id, user_id, role)
@@ -428,9 +448,11 @@ def add_member_to_workspace_by_email(
                 "user_id": user_id,
                 "role": payload.role.value,
             },
-        ).mappings().first()
+        )
+        row = result.mappings().first()
 
-        db.commit()
+        await db.commit()
+        invalidate_role(workspace_id, user_id)
 
         if not row:
             raise HTTPException(
@@ -444,10 +466,110 @@ def add_member_to_workspace_by_email(
             "created_at": row["created_at"].isoformat() if row["created_at"] else None,
         }
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:  # noqa: BLE001
         logger.exception("Failed to add workspace member")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.post("/{workspace_id}/members/by-email/bulk")
+async def add_members_to_workspace_by_email(
+    workspace_id: UUID,
+    payload: WorkspaceMembersCreateByEmail,
+    x_user_id: Optional[UUID] = Header(None, alias="X-User-Id"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Adds (or updates) many workspace members by email in one call.
+
+    One permission check covers the whole request (OWNER if any OWNER/ADMIN role
+    is assigned, else ADMIN). Emails are resolved concurrently, at most
+    INVITE_LOOKUP_CONCURRENCY at a time, and all resolved members are written
+    with one multi-row upsert. Returns a result per email, in request order;
+    unresolvable emails are reported and skipped. If an email appears twice,
+    or two emails resolve to the same user, the later entry's role wins.
+    """
+    if any(m.role in (MemberRole.OWNER, MemberRole.ADMIN) for m in payload.members):
+        await require_role(db, workspace_id, x_user_id, "OWNER")
+    else:
+        await require_role(db, workspace_id, x_user_id, "ADMIN")
+
+    semaphore = asyncio.Semaphore(INVITE_LOOKUP_CONCURRENCY)
+
+    async def resolve(email: str) -> UUID:
+        async with semaphore:
+            return await supabase_admin.lookup_user_id_by_email(email)
+
+    emails = list(dict.fromkeys(m.email.lower() for m in payload.members))
+    resolved = await asyncio.gather(*(resolve(email) for email in emails), return_exceptions=True)
+    user_ids = dict(zip(emails, resolved))
+
+    roles: dict[UUID, str] = {}
+    for member in payload.members:
+        user_id = user_ids[member.email.lower()]
+        if isinstance(user_id, UUID):
+            roles[user_id] = member.role.value
+
+    rows = {}
+    if roles:
+        values = []
+        params: dict = {"workspace_id": workspace_id}
+        for i, (user_id, role) in enumerate(roles.items()):
+            values.append(f"(:workspace_id, :user_id_{i}, :role_{i})")
+            params[f"user_id_{i}"] = user_id
+            params[f"role_{i}"] = role
+        try:
+            result = await db.execute(
+                text(
+                    f"""
+                    INSERT INTO workspace_members (workspace_id, user_id, role)
+                    VALUES {", ".join(values)}
+                    ON CONFLICT (workspace_id, user_id)
+                    DO UPDATE SET role = EXCLUDED.role
+                    RETURNING workspace_id, user_id, role, created_at
+                    """
+                ),
+                params,
+            )
+            rows = {row["user_id"]: row for row in result.mappings().all()}
+            await db.commit()
+        except Exception as e:  # noqa: BLE001
+            logger.exception("Failed to add workspace members")
+            await db.rollback()
+            raise HTTPException(status_code=500, detail=str(e))
+        for user_id in rows:
+            invalidate_role(workspace_id, user_id)
+
+    results = []
+    for member in payload.members:
+        user_id = user_ids[member.email.lower()]
+        if isinstance(user_id, HTTPException):
+            results.append(
+                {"email": member.email, "status": "failed", "status_code": user_id.status_code, "detail": user_id.detail}
+            )
+        elif isinstance(user_id, BaseException):
+            logger.error("Failed to resolve %s: %r", member.email, user_id)
+            results.append({"email": member.email, "status": "failed", "status_code": 500, "detail": str(user_id)})
+        else:
+            row = rows[user_id]
+            results.append(
+                {
+                    "email": member.email,
+                    "status": "added",
+                    # str(): asyncpg returns its own UUID type for RETURNING columns.
+                    "workspace_id": str(row["workspace_id"]),
+                    "user_id": str(row["user_id"]),
+                    "role": row["role"],
+                    "created_at": row["created_at"],
+                }
+            )
+
+    return serializers.json_response(
+        {
+            "added": sum(1 for r in results if r["status"] == "added"),
+            "failed": sum(1 for r in results if r["status"] == "failed"),
+            "results": results,
+        }
+    )
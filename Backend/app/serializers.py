@@ -0,0 +1,55 @@
+"""
+Fast JSON for hot read routes.
+
+Routes return `json_response(...)` instead of plain dicts, which skips FastAPI's
+jsonable_encoder / response_model pass and renders with orjson. orjson encodes
+uuid.UUID and datetime natively (same text as str() / isoformat()). asyncpg
+returns its own UUID subclass, which orjson rejects, so UUID subclasses go
+through `_default` as str, as does Decimal as float. Row encoders only pick
+fields; no per-value str()/isoformat()/float() calls are needed.
+"""
+from decimal import Decimal
+from operator import itemgetter
+from typing import Any, Callable, Optional
+from uuid import UUID
+
+import orjson
+from fastapi import Response
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def json_response(content: Any, response: Optional[Response] = None, status_code: int = 200) -> FastJSONResponse:
+    """Render content with orjson, keeping headers already set on the route's injected Response."""
+    headers = None
+    if response is not None:
+        headers = {k: v for k, v in response.headers.items() if k not in ("content-length", "content-type")}
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
+
+
+def row_encoder(*fields: str) -> Callable[[Any], dict[str, Any]]:
+    """Build an encoder that copies `fields` out of a row mapping into a plain dict."""
+    getter = itemgetter(*fields)
+    if len(fields) == 1:
+        return lambda row: {fields[0]: getter(row)}
+    return lambda row: dict(zip(fields, getter(row)))
+
+
+encode_device = row_encoder("id", "workspace_id", "device_name", "status", "last_seen_at", "created_at")
+encode_outlet = row_encoder("id", "device_id", "is_active", "outlet_name")
+encode_workspace = row_encoder("id", "name", "created_by", "created_at")
+encode_member = row_encoder("user_id", "role", "display_name")
+encode_reading = row_encoder("id", "device_id", "sensor_type", "value", "unit", "raw", "created_at")
@@ -0,0 +1,190 @@
+"""
+Supabase Admin API lookups of auth users by email.
+
+One long-lived httpx.AsyncClient is opened in the app lifespan (`start`/`stop`)
+so invites reuse pooled, kept-alive TLS connections instead of a handshake each.
+Resolved ids are cached per email for EMAIL_CACHE_TTL_SECONDS; "no such user"
+is cached too, for EMAIL_CACHE_NEGATIVE_TTL_SECONDS, so a newly signed-up user
+shows up soon. Concurrent lookups of the same email share one in-flight request.
+
+Errors are raised as HTTPException (404 unknown email, 502 admin API trouble),
+as the invite routes return them as is.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Optional
+from uuid import UUID
+
+import httpx
+from fastapi import HTTPException
+
+from .cache import LRUCache, MISSING
+
+logger = logging.getLogger(__name__)
+
+ADMIN_TIMEOUT_SECONDS = float(os.getenv("SUPABASE_ADMIN_TIMEOUT_SECONDS", "10"))
+ADMIN_MAX_CONNECTIONS = int(os.getenv("SUPABASE_ADMIN_MAX_CONNECTIONS", "20"))
+NEGATIVE_TTL_SECONDS = float(os.getenv("EMAIL_CACHE_NEGATIVE_TTL_SECONDS", "30"))
+
+# Cached "user does not exist" answer.
+NOT_FOUND = object()
+
+_cache = LRUCache(
+    max_entries=int(os.getenv("EMAIL_CACHE_MAX_ENTRIES", "10000")),
+    ttl_seconds=float(os.getenv("EMAIL_CACHE_TTL_SECONDS", "300")),
+)
+_client: Optional[httpx.AsyncClient] = None
+_inflight: dict[str, asyncio.Task] = {}
+_requests = 0
+_collapsed = 0
+
+
+def _admin_config() -> tuple[str, str]:
+    """
+    Returns (base_url, service_role_key) for Supabase admin API.
+    """
+    base_url = os.getenv("SUPABASE_URL")
+    service_role_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    if not base_url or not service_role_key:
+        raise RuntimeError("Supabase admin env vars are not configured")
+    # Normalize URL without trailing slash
+    return base_url.rstrip("/"), service_role_key
+
+
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=ADMIN_TIMEOUT_SECONDS,
+        limits=httpx.Limits(max_connections=ADMIN_MAX_CONNECTIONS, max_keepalive_connections=ADMIN_MAX_CONNECTIONS),
+    )
+
+
+async def start() -> None:
+    global _client
+    if _client is None:
+        _client = _new_client()
+
+
+async def stop() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _not_found() -> HTTPException:
+    return HTTPException(status_code=404, detail="User with that email not found")
+
+
+async def _fetch_user_id(email: str) -> UUID:
+    global _client, _requests
+    base_url, service_role_key = _admin_config()
+    if _client is None:
+        # Used outside the app lifespan (scripts); keep one client for the process anyway.
+        _client = _new_client()
+    headers = {
+        "Authorization": f"Bearer {service_role_key}",
+        "apikey": service_role_key,
+    }
+
+    _requests += 1
+    try:
+        resp = await _client.get(f"{base_url}/auth/v1/admin/users", params={"email": email}, headers=headers)
+    except httpx.RequestError as exc:
+        logger.exception("Failed to contact Supabase admin API")
+        raise HTTPException(
+            status_code=502,
+            detail=f"Error contacting Supabase admin API: {exc}",
+        )
+
+    if resp.status_code != 200:
+        logger.error("Supabase admin API returned %s: %s", resp.status_code, resp.text)
+        raise HTTPException(
+            status_code=502,
+            detail="Failed to lookup user by email in Supabase",
+        )
+
+    data = resp.json()
+    users = data.get("users") if isinstance(data, dict) else data
+    if not users:
+        raise _not_found()
+
+    # Be defensive: some Supabase deployments may ignore the email filter
+    # and return multiple users. Explicitly pick the one whose email matches.
+    user = None
+    for candidate in users:
+        candidate_email = candidate.get("email")
+        if candidate_email and candidate_email.lower() == email.lower():
+            user = candidate
+            break
+
+    if user is None:
+        logger.error("No Supabase user matched email=%s in response: %s", email, users)
+        raise _not_found()
+    user_id = user.get("id")
+    if not user_id:
+        logger.error("Supabase user record missing 'id': %s", user)
+        raise HTTPException(
+            status_code=502,
+            detail="Supabase user record is missing id",
+        )
+
+    try:
+        return UUID(user_id)
+    except Exception as exc:  # noqa: BLE001
+        logger.exception("Invalid Supabase user id: %s", user_id)
+        raise HTTPException(
+            status_code=502,
+            detail=f"Supabase returned invalid user id: {exc}",
+        )
+
+
+async def _resolve(key: str, email: str) -> UUID:
+    try:
+        user_id = await _fetch_user_id(email)
+    except HTTPException as exc:
+        if exc.status_code == 404:
+            _cache.set(key, NOT_FOUND, ttl_seconds=NEGATIVE_TTL_SECONDS)
+        raise
+    _cache.set(key, user_id)
+    return user_id
+
+
+def _finished(key: str, task: asyncio.Task) -> None:
+    _inflight.pop(key, None)
+    if not task.cancelled():
+        task.exception()  # mark retrieved even if every waiter went away
+
+
+async def lookup_user_id_by_email(email: str) -> UUID:
+    """Resolve a Supabase auth user id from an email address."""
+    global _collapsed
+    key = email.strip().lower()
+    cached = _cache.get(key)
+    if cached is NOT_FOUND:
+        raise _not_found()
+    if cached is not MISSING:
+        return cached
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_resolve(key, email.strip()))
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _finished(key, t))
+    else:
+        _collapsed += 1
+    # shield: one caller going away must not cancel the lookup for the others.
+    return await asyncio.shield(task)
+
+
+def invalidate(email: str) -> None:
+    _cache.pop(email.strip().lower())
+
+
+def stats() -> dict[str, Any]:
+    return {
+        **_cache.stats(),
+        "admin_requests_total": _requests,
+        "collapsed_lookups_total": _collapsed,
+        "inflight": len(_inflight),
+    }
@@ -15,9 +15,14 @@ const int waterThreshold = 3000;  // analog below this = water detected (adjust
 const int gasThreshold = 1000;
 const int overheatThreshold = 300; 
 
+// Frame sequence number: a retried POST reuses it so the backend stores the frame once.
+// Seeded randomly at boot so numbers from before a reset are not reused.
+uint32_t frameSeq = 0;
+
 
 void setup() {
   Serial.begin(115200);
+  frameSeq = esp_random() & 0x7FFFFFFF;
   // WiFi.begin(ssid, password);
   // Serial.print("Connecting to WiFi");
   // while (WiFi.status() != WL_CONNECTED) {
@@ -76,68 +81,53 @@ void loop() {
   Serial.println("-----------------------------");
 
   if (WiFi.status() == WL_CONNECTED) {
+    // One POST per loop: water, gas and temp share a timestamp and are stored in one transaction.
+    // The backend has no "gas" sensor type; the gas sensor reports as "smoke".
     HTTPClient http;
-    String url = String(backendBaseUrl) + "/sensor-readings";
+    String url = String(backendBaseUrl) + "/sensor-readings/frame";
     http.begin(url);
     http.addHeader("Content-Type", "application/json");
 
     // Build JSON without " or \" in source (use quote variable)
     char q = char(34);
+    frameSeq++;
     String json = String("{") + String(q) + "device_id" + String(q) + ":" + String(q) + deviceId + String(q) + ","
-                  + String(q) + "sensor_type" + String(q) + ":" + String(q) + "water" + String(q) + ","
+                  + String(q) + "seq" + String(q) + ":" + String(frameSeq) + ","
+                  + String(q) + "readings" + String(q) + ":["
+                  // water
+                  + "{" + String(q) + "sensor_type" + String(q) + ":" + String(q) + "water" + String(q) + ","
                   + String(q) + "value" + String(q) + ":" + String(value) + ","
                   + String(q) + "unit" + String(q) + ":" + String(q) + "analog" + String(q) + ","
                   + String(q) + "raw" + String(q) + ":{" + String(q) + "waterDetected" + String(q) + ":"
-                  + (waterDetected ? "true" : "false") + "}}";
+                  + (waterDetected ? "true" : "false") + "}},"
+                  // gas
+                  + "{" + String(q) + "sensor_type" + String(q) + ":" + String(q) + "smoke" + String(q) + ","
+                  + String(q) + "value" + String(q) + ":" + String(gasValue) + ","
+                  + String(q) + "unit" + String(q) + ":" + String(q) + "analog" + String(q) + ","
+                  + String(q) + "raw" + String(q) + ":{" + String(q) + "gasDetected" + String(q) + ":"
+                  + (gasDetected ? "true" : "false") + "}},"
+                  // temp
+                  + "{" + String(q) + "sensor_type" + String(q) + ":" + String(q) + "temp" + String(q) + ","
+                  + String(q) + "value" + String(q) + ":" + String(temperatureC) + ","
+                  + String(q) + "unit" + String(q) + ":" + String(q) + "C" + String(q) + ","
+                  + String(q) + "raw" + String(q) + ":{"
+                  + String(q) + "tempValue" + String(q) + ":" + String(tempValue) + ","
+                  + String(q) + "temperatureC" + String(q) + ":" + String(temperatureC) + ","
+                  + String(q) + "overheatDetected" + String(q) + ":" + (overheatDetected ? "true" : "false") + ","
+                  + String(q) + "threshold" + String(q) + ":" + String(overheatThreshold) + "}}"
+                  + "]}";
 
     int httpCode = http.POST(json);
-    Serial.print("POST /sensor-readings (water) -> ");
+    if (httpCode <= 0 || httpCode >= 500) {
+      // Transport error or server error: retry once with the same seq.
+      delay(500);
+      httpCode = http.POST(json);
+    }
+    Serial.print("POST /sensor-readings/frame -> ");
     Serial.println(httpCode);
     http.end();
-
-    // GAS JSON: TODO
-    // HTTPClient httpGas;
-
-    // String gasJson = String("{") +
-    //   String(q) + "device_id" + String(q) + ":" + String(q) + deviceId + String(q) + "," +
-    //   String(q) + "sensor_type" + String(q) + ":" + String(q) + "gas" + String(q) + "," +
-    //   String(q) + "value" + String(q) + ":" + String(gasValue) + "," +
-    //   String(q) + "unit" + String(q) + ":" + String(q) + "analog" + String(q) + "}";
-
-    // httpGas.begin(String(backendBaseUrl) + "/sensor-readings");
-    // httpGas.addHeader("Content-Type", "application/json");
-
-    // int gasCode = httpGas.POST(gasJson);
-
-    // Serial.print("POST gas -> ");
-    // Serial.println(gasCode);
-
-    // httpGas.end();
-
-    HTTPClient httpTemp;
-    String tempUrl = String(backendBaseUrl) + "/sensor-readings";
-    httpTemp.begin(tempUrl);
-    httpTemp.addHeader("Content-Type", "application/json");
-
-    String tempJson = String("{") + String(q) + "device_id" + String(q) + ":" + String(q) + deviceId + String(q) + ","
-                    + String(q) + "sensor_type" + String(q) + ":" + String(q) + "temp" + String(q) + ","
-                    + String(q) + "value" + String(q) + ":" + String(temperatureC) + ","
-                    + String(q) + "unit" + String(q) + ":" + String(q) + "C" + String(q) + ","
-                    + String(q) + "raw" + String(q) + ":{"
-                    + String(q) + "tempValue" + String(q) + ":" + String(tempValue) + ","
-                    + String(q) + "temperatureC" + String(q) + ":" + String(temperatureC) + ","
-                    + String(q) + "overheatDetected" + String(q) + ":" + (overheatDetected ? "true" : "false") + ","
-                    + String(q) + "threshold" + String(q) + ":" + String(overheatThreshold) + "}}";
-
-    int tempCode = httpTemp.POST(tempJson);
-    Serial.print("POST /sensor-readings (temp) -> ");
-    Serial.println(tempCode);
-    httpTemp.end();
-
-
-
   }
-  
+
 
   delay(2000);
 }
@@ -0,0 +1,66 @@
+"""
+Run from Backend folder: python scripts/backfill_rollups.py --days 30
+
+Builds sensor_readings_rollup_1m / _1h for existing history, one day per transaction.
+The tables must exist first: python scripts/migrate_rollup_tables.py --apply
+"""
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import argparse
+import os
+import sys
+
+# Load Backend/.env into os.environ (no extra package required)
+_env_file = Path(__file__).resolve().parent.parent / ".env"
+if _env_file.exists():
+    for line in _env_file.read_text().strip().splitlines():
+        line = line.strip()
+        if line and not line.startswith("#") and "=" in line:
+            k, v = line.split("=", 1)
+            os.environ.setdefault(k.strip(), v.strip().strip('"').strip("'"))
+
+sys.path.insert(0, str(_env_file.parent))
+from sqlalchemy import text
+from app.database import SessionLocal
+from app.models import SensorReadingRollup1h, SensorReadingRollup1m
+from app.rollups import floor_to_bucket, run_rollups
+
+
+def missing_tables():
+    with SessionLocal() as db:
+        return [
+            model.__tablename__
+            for model in (SensorReadingRollup1m, SensorReadingRollup1h)
+            if db.execute(text("SELECT to_regclass(:table)"), {"table": model.__tablename__}).scalar() is None
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=30, help="How many days back to backfill")
+    args = parser.parse_args()
+
+    missing = missing_tables()
+    if missing:
+        sys.exit(f"Missing {', '.join(missing)}; run python scripts/migrate_rollup_tables.py --apply first")
+
+    end = floor_to_bucket(datetime.now(timezone.utc), 60)
+    day_start = floor_to_bucket(end - timedelta(days=args.days), 86400)
+    while day_start < end:
+        day_end = min(day_start + timedelta(days=1), end)
+        db = SessionLocal()
+        try:
+            run_rollups(db, day_start, day_end)
+            db.commit()
+            print(f"Rolled up {day_start.isoformat()} .. {day_end.isoformat()}")
+        except Exception as e:
+            db.rollback()
+            print("Backfill failed:", e)
+            sys.exit(1)
+        finally:
+            db.close()
+        day_start = day_end
+
+
+if __name__ == "__main__":
+    main()
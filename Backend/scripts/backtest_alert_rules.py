@@ -0,0 +1,58 @@
+"""
+Run from Backend folder:
+    python scripts/backtest_alert_rules.py --device-id <uuid> --sensor-type water --days 30 \\
+        --rule "<,3000,0" --rule "<,3000,10"
+
+Each --rule is comparator,threshold[,duration_seconds]. Prints the backtest report as JSON.
+"""
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+
+# Load Backend/.env into os.environ (no extra package required)
+_env_file = Path(__file__).resolve().parent.parent / ".env"
+if _env_file.exists():
+    for line in _env_file.read_text().strip().splitlines():
+        line = line.strip()
+        if line and not line.startswith("#") and "=" in line:
+            k, v = line.split("=", 1)
+            os.environ.setdefault(k.strip(), v.strip().strip('"').strip("'"))
+
+sys.path.insert(0, str(_env_file.parent))
+from app.backtest import run_backtest
+from app.models import SensorType
+
+
+def parse_rule(value: str) -> dict:
+    parts = [p.strip() for p in value.split(",")]
+    if len(parts) not in (2, 3):
+        raise argparse.ArgumentTypeError("rule must be comparator,threshold[,duration_seconds]")
+    return {
+        "comparator": parts[0],
+        "threshold_value": float(parts[1]),
+        "duration_seconds": int(parts[2]) if len(parts) == 3 else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--device-id", type=uuid.UUID, required=True)
+    parser.add_argument("--sensor-type", type=SensorType, default=SensorType.WATER)
+    parser.add_argument("--days", type=float, default=30, help="History window ending now")
+    parser.add_argument("--rule", type=parse_rule, action="append", required=True)
+    args = parser.parse_args()
+
+    end = datetime.now(timezone.utc)
+    started = time.perf_counter()
+    report = run_backtest(args.device_id, args.sensor_type, args.rule, end - timedelta(days=args.days), end)
+    report["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+Run from Backend folder against a local/scratch database:
+    python scripts/bench_hot_paths.py --yes --out bench.json
+    python scripts/bench_hot_paths.py --yes --out bench-new.json --baseline bench.json
+
+Starts the FastAPI app in-process (lifespan included, requests sent through
+httpx.ASGITransport, so no server or network is involved) and measures p50/p99
+latency and throughput of the hot paths:
+
+    ingest               POST /sensor-readings
+    latest               GET /sensor-readings/latest (first hit per device is a cache miss)
+    device_outlets       GET /api/device-outlets
+    require_role_cold    permissions.require_role with the role cache emptied
+    require_role_cached  permissions.require_role served from the role cache
+    workspaces           GET /api/workspaces?member_user_id=...
+    workspace_devices    GET /api/workspaces/{id}/devices
+
+Seeds --devices devices (100 per workspace, 4 outlets each) with members and
+--readings readings spread over --days days. Production-sized tables (~100M
+readings) are sampled down: per-device index depth, not table size, is what the
+measured queries depend on, so raise --readings to check that stays flat.
+Everything seeded is deleted at the end.
+
+The tables it uses are managed by Supabase in production. On a scratch database
+pass --create-schema to create any that are missing from scripts/bench_schema.sql;
+without it the run stops if one of them does not exist.
+
+Results are written as JSON (--out). With --baseline, p50 and throughput are
+compared to a previous run and the script exits 1 if any case regressed by
+more than --max-regression. A run in which any request failed exits 1 without
+writing results or comparing, since its timings are not those of the real path.
+"""
+from datetime import datetime, timezone
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+# Load Backend/.env into os.environ (no extra package required)
+_env_file = Path(__file__).resolve().parent.parent / ".env"
+if _env_file.exists():
+    for line in _env_file.read_text().strip().splitlines():
+        line = line.strip()
+        if line and not line.startswith("#") and "=" in line:
+            k, v = line.split("=", 1)
+            os.environ.setdefault(k.strip(), v.strip().strip('"').strip("'"))
+
+sys.path.insert(0, str(_env_file.parent))
+import httpx
+from fastapi import HTTPException
+from sqlalchemy import bindparam, text
+from app import permissions
+from app.database import AsyncSessionLocal, SessionLocal
+from app.main import app
+from app.models import SensorReading, SensorType
+
+SCHEMA_FILE = Path(__file__).resolve().parent / "bench_schema.sql"
+REQUIRED_TABLES = (
+    "profiles",
+    "workspaces",
+    "workspace_members",
+    "devices",
+    "device_outlets",
+    "sensor_readings",
+    "device_outlet_revisions",
+)
+
+DEVICES_PER_WORKSPACE = 100
+OUTLETS_PER_DEVICE = 4
+MEMBERS_PER_WORKSPACE = 20
+BASE_URL = "http://bench"
+
+
+def ensure_schema(db, create):
+    """Create the bench tables from SCHEMA_FILE if asked, then exit if any is still missing."""
+    if create:
+        db.connection().exec_driver_sql(SCHEMA_FILE.read_text())
+        db.commit()
+    missing = [
+        table
+        for table in REQUIRED_TABLES
+        if db.execute(text("SELECT to_regclass(:table)"), {"table": table}).scalar() is None
+    ]
+    if missing:
+        sys.exit(f"Missing tables: {', '.join(missing)}; pass --create-schema to create them from {SCHEMA_FILE.name}")
+
+
+def seed(db, owner_id, devices, readings, days):
+    """Create workspaces, members, devices, outlets and readings in SQL. Returns (workspace_ids, device_ids, member_ids)."""
+    workspace_ids = [uuid.uuid4() for _ in range(max(1, devices // DEVICES_PER_WORKSPACE))]
+    device_ids = [uuid.uuid4() for _ in range(devices)]
+    member_ids = [uuid.uuid4() for _ in range(MEMBERS_PER_WORKSPACE)]
+    ids = {
+        "workspace_ids": [str(w) for w in workspace_ids],
+        "device_ids": [str(d) for d in device_ids],
+        "member_ids": [str(m) for m in member_ids],
+    }
+
+    db.execute(
+        text(
+            """
+            INSERT INTO workspaces (id, name, created_by, created_at)
+            SELECT w, 'bench workspace ' || ordinality, :owner_id, now() - ordinality * interval '1 second'
+            FROM unnest(CAST(:workspace_ids AS uuid[])) WITH ORDINALITY AS w
+            """
+        ),
+        {"owner_id": owner_id, "workspace_ids": ids["workspace_ids"]},
+    )
+    db.execute(
+        text(
+            """
+            INSERT INTO workspace_members (workspace_id, user_id, role)
+            SELECT w, m, 'VIEWER'
+            FROM unnest(CAST(:workspace_ids AS uuid[])) AS w
+            CROSS JOIN unnest(CAST(:member_ids AS uuid[])) AS m
+            """
+        ),
+        {"workspace_ids": ids["workspace_ids"], "member_ids": ids["member_ids"]},
+    )
+    db.execute(
+        text(
+            """
+            INSERT INTO devices (id, workspace_id, device_name, status, created_at)
+            SELECT d,
+                   (CAST(:workspace_ids AS uuid[]))[1 + ((ordinality - 1) % :workspace_count)],
+                   'bench device ' || ordinality,
+                   'offline',
+                   now() - ordinality * interval '1 second'
+            FROM unnest(CAST(:device_ids AS uuid[])) WITH ORDINALITY AS d
+            """
+        ),
+        {**ids, "workspace_count": len(workspace_ids)},
+    )
+    db.execute(
+        text(
+            """
+            INSERT INTO device_outlets (id, device_id, is_active, outlet_name)
+            SELECT gen_random_uuid(), d, n % 2 = 0, 'Outlet ' || n
+            FROM unnest(CAST(:device_ids AS uuid[])) AS d
+            CROSS JOIN generate_series(1, :outlets) AS n
+            """
+        ),
+        {"device_ids": ids["device_ids"], "outlets": OUTLETS_PER_DEVICE},
+    )
+
+    # sensor_type is bound through the model's column type so it is stored exactly as the app stores it.
+    insert_readings = text(
+        """
+        INSERT INTO sensor_readings (id, device_id, sensor_type, value, unit, created_at)
+        SELECT gen_random_uuid(),
+               (CAST(:device_ids AS uuid[]))[1 + (g % :device_count)],
+               :sensor_type,
+               random() * 4095,
+               'analog',
+               now() - random() * make_interval(days => :days)
+        FROM generate_series(1, :rows) AS g
+        """
+    ).bindparams(bindparam("sensor_type", type_=SensorReading.__table__.c.sensor_type.type))
+    per_type = readings // len(SensorType)
+    for sensor_type in SensorType:
+        db.execute(
+            insert_readings,
+            {"device_ids": ids["device_ids"], "device_count": len(device_ids), "rows": per_type, "days": days, "sensor_type": sensor_type},
+        )
+    db.commit()
+    return workspace_ids, device_ids, member_ids
+
+
+def cleanup(db, owner_id, workspace_ids, device_ids):
+    params = {"workspace_ids": [str(w) for w in workspace_ids], "device_ids": [str(d) for d in device_ids]}
+    db.execute(text("DELETE FROM sensor_readings WHERE device_id = ANY(CAST(:device_ids AS uuid[]))"), params)
+    db.execute(text("DELETE FROM device_outlets WHERE device_id = ANY(CAST(:device_ids AS uuid[]))"), params)
+    db.execute(text("DELETE FROM devices WHERE id = ANY(CAST(:device_ids AS uuid[]))"), params)
+    db.execute(text("DELETE FROM workspace_members WHERE workspace_id = ANY(CAST(:workspace_ids AS uuid[]))"), params)
+    db.execute(
+        text("DELETE FROM workspaces WHERE id = ANY(CAST(:workspace_ids AS uuid[])) OR created_by = :owner_id"),
+        {**params, "owner_id": owner_id},
+    )
+    db.commit()
+
+
+def summarize(samples, errors, wall_seconds):
+    ordered = sorted(samples)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p99_ms": round(ordered[max(0, int(len(ordered) * 0.99) - 1)] * 1000, 3),
+        "rps": round(len(ordered) / wall_seconds, 1),
+    }
+
+
+async def run_case(fn, requests, concurrency, warmup):
+    """Call fn(i) requests times with up to concurrency in flight. fn returns False on an error response."""
+    for i in range(warmup):
+        await fn(i)
+
+    sem = asyncio.Semaphore(concurrency)
+    samples = []
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        async with sem:
+            started = time.perf_counter()
+            ok = await fn(i)
+            samples.append(time.perf_counter() - started)
+            if ok is False:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return summarize(samples, errors, time.perf_counter() - started)
+
+
+async def run_cases(args, owner_id, workspace_ids, device_ids, member_ids):
+    def device(i):
+        return device_ids[i % len(device_ids)]
+
+    def workspace(i):
+        return workspace_ids[i % len(workspace_ids)]
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url=BASE_URL) as client:
+
+            async def ingest(i):
+                resp = await client.post(
+                    "/sensor-readings",
+                    json={"device_id": str(device(i)), "sensor_type": SensorType.WATER.value, "value": i % 4096, "unit": "analog"},
+                )
+                return resp.status_code < 400
+
+            async def latest(i):
+                resp = await client.get(
+                    "/sensor-readings/latest",
+                    params={"device_id": str(device(i)), "sensor_type": SensorType.TEMP.value},
+                )
+                return resp.status_code < 400
+
+            async def device_outlets(i):
+                resp = await client.get("/api/device-outlets", params={"device_id": str(device(i))})
+                return resp.status_code < 400
+
+            async def workspaces(i):
+                resp = await client.get(
+                    "/api/workspaces",
+                    params={"member_user_id": str(member_ids[i % len(member_ids)]), "limit": 50},
+                )
+                return resp.status_code < 400
+
+            async def workspace_devices(i):
+                resp = await client.get(
+                    f"/api/workspaces/{workspace(i)}/devices",
+                    params={"limit": 50},
+                    headers={"X-User-Id": str(owner_id)},
+                )
+                return resp.status_code < 400
+
+            cases = {
+                "ingest": ingest,
+                "latest": latest,
+                "device_outlets": device_outlets,
+                "workspaces": workspaces,
+                "workspace_devices": workspace_devices,
+            }
+            for name, fn in cases.items():
+                results[name] = await run_case(fn, args.requests, args.concurrency, args.warmup)
+                print(f"{name:20s} done", flush=True)
+
+        async def role(i, cold):
+            workspace_id, user_id = workspace(i), member_ids[i % len(member_ids)]
+            if cold:
+                permissions.invalidate_role(workspace_id, user_id)
+            async with AsyncSessionLocal() as db:
+                try:
+                    await permissions.require_role(db, workspace_id, user_id, "VIEWER")
+                except HTTPException:
+                    return False
+
+        results["require_role_cold"] = await run_case(lambda i: role(i, True), args.requests, args.concurrency, args.warmup)
+        results["require_role_cached"] = await run_case(lambda i: role(i, False), args.requests, args.concurrency, args.warmup)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=_env_file.parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, max_regression):
+    """Print the change against baseline per case; returns the names of regressed cases."""
+    regressed = []
+    print(f"\n{'case':20s} {'p50 ms':>10s} {'base':>10s} {'rps':>10s} {'base':>10s}")
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:20s} {current['p50_ms']:10.3f} {'-':>10s} {current['rps']:10.1f} {'-':>10s}")
+            continue
+        slower = current["p50_ms"] > base["p50_ms"] * (1 + max_regression)
+        fewer = current["rps"] < base["rps"] * (1 - max_regression)
+        flag = "  REGRESSED" if slower or fewer else ""
+        print(f"{name:20s} {current['p50_ms']:10.3f} {base['p50_ms']:10.3f} {current['rps']:10.1f} {base['rps']:10.1f}{flag}")
+        if flag:
+            regressed.append(name)
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=10000)
+    parser.add_argument("--readings", type=int, default=1000000, help="Readings to seed, split evenly across sensor types")
+    parser.add_argument("--days", type=int, default=30, help="Seeded readings are spread over this many days")
+    parser.add_argument("--requests", type=int, default=2000, help="Measured requests per case")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--out", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Results JSON of a previous run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed fractional p50/throughput regression")
+    parser.add_argument("--create-schema", action="store_true", help=f"Create missing tables from {SCHEMA_FILE.name}")
+    parser.add_argument("--yes", action="store_true", help="Confirm this is a scratch database")
+    args = parser.parse_args()
+    if not args.yes:
+        sys.exit("Seeds and deletes rows; run against a local/scratch database and pass --yes")
+
+    owner_id = uuid.uuid4()
+    started_at = datetime.now(timezone.utc)
+    with SessionLocal() as db:
+        ensure_schema(db, args.create_schema)
+        print(f"Seeding {args.devices} devices and {args.readings} readings...", flush=True)
+        started = time.perf_counter()
+        workspace_ids, device_ids, member_ids = seed(db, owner_id, args.devices, args.readings, args.days)
+        print(f"Seeded in {time.perf_counter() - started:.1f}s", flush=True)
+    try:
+        results = asyncio.run(run_cases(args, owner_id, workspace_ids, device_ids, member_ids))
+    finally:
+        with SessionLocal() as db:
+            cleanup(db, owner_id, workspace_ids, device_ids)
+
+    report = {
+        "meta": {
+            "started_at": started_at.isoformat(),
+            "commit": git_commit(),
+            "devices": args.devices,
+            "readings": args.readings,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+    for name, r in results.items():
+        print(f"{name:20s} p50 {r['p50_ms']:9.3f} ms  p99 {r['p99_ms']:9.3f} ms  {r['rps']:9.1f} req/s  errors {r['errors']}")
+    failed = [name for name, r in results.items() if r["errors"]]
+    if failed:
+        sys.exit(f"Requests failed in {', '.join(failed)}; not writing or comparing results")
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Wrote {args.out}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())["results"]
+        failed = [name for name, r in baseline.items() if r.get("errors")]
+        if failed:
+            sys.exit(f"Baseline {args.baseline} has failed requests in {', '.join(failed)}; re-record it")
+        regressed = compare(results, baseline, args.max_regression)
+        if regressed:
+            sys.exit(f"Regressed beyond {args.max_regression:.0%}: {', '.join(regressed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+-- Minimal schema for running scripts/bench_hot_paths.py against a scratch Postgres.
+-- In production these tables are managed by Supabase; this file only mirrors the
+-- columns and keys the app's queries use. Every statement is idempotent, so it
+-- is safe to run against a database that already has some of the tables:
+--     python scripts/bench_hot_paths.py --create-schema --yes
+-- or  psql "$DATABASE_URL" -f scripts/bench_schema.sql
+
+DO $$
+BEGIN
+    CREATE TYPE sensortype AS ENUM ('CURRENT', 'SMOKE', 'WATER', 'HUMIDITY', 'TEMP');
+EXCEPTION
+    WHEN duplicate_object THEN NULL;
+END
+$$;
+
+CREATE TABLE IF NOT EXISTS profiles (
+    user_id uuid PRIMARY KEY,
+    display_name text,
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS workspaces (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    name text NOT NULL,
+    created_by uuid,
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS ix_workspaces_created_by ON workspaces (created_by);
+CREATE INDEX IF NOT EXISTS ix_workspaces_created_at_id ON workspaces (created_at DESC, id DESC);
+
+CREATE TABLE IF NOT EXISTS workspace_members (
+    workspace_id uuid NOT NULL REFERENCES workspaces (id) ON DELETE CASCADE,
+    user_id uuid NOT NULL,
+    role text NOT NULL,
+    created_at timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (workspace_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS ix_workspace_members_user_id ON workspace_members (user_id);
+
+CREATE TABLE IF NOT EXISTS devices (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    workspace_id uuid REFERENCES workspaces (id) ON DELETE CASCADE,
+    device_name text NOT NULL,
+    status text,
+    last_seen_at timestamptz,
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS ix_devices_workspace_created ON devices (workspace_id, created_at DESC, id DESC);
+
+CREATE TABLE IF NOT EXISTS device_outlets (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    device_id uuid NOT NULL REFERENCES devices (id) ON DELETE CASCADE,
+    is_active boolean NOT NULL DEFAULT false,
+    outlet_name text NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_device_outlets_device_id ON device_outlets (device_id);
+
+CREATE TABLE IF NOT EXISTS sensor_readings (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    device_id uuid NOT NULL,
+    sensor_type sensortype NOT NULL,
+    value numeric NOT NULL,
+    unit text,
+    raw jsonb,
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS ix_sensor_readings_device_type_created
+    ON sensor_readings (device_id, sensor_type, created_at DESC);
+
+-- Owned by the app; also created by scripts/migrate_outlet_revisions.py.
+CREATE TABLE IF NOT EXISTS device_outlet_revisions (
+    device_id uuid PRIMARY KEY,
+    revision bigint NOT NULL
+);
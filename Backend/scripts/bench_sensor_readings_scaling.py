@@ -0,0 +1,128 @@
+"""
+Run from Backend folder against a local/scratch database:
+    python scripts/bench_sensor_readings_scaling.py --sizes 100000 1000000 10000000 --yes
+
+Grows sensor_readings in steps and, at each size, measures p50/p99 latency of the
+/latest query and of a single-row insert. With the composite
+(device_id, sensor_type, created_at DESC) index, and partitions when migrated,
+both should stay flat as the table grows. Seeded rows use dedicated device ids
+and are deleted at the end.
+"""
+from datetime import datetime, timezone
+from pathlib import Path
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+
+# Load Backend/.env into os.environ (no extra package required)
+_env_file = Path(__file__).resolve().parent.parent / ".env"
+if _env_file.exists():
+    for line in _env_file.read_text().strip().splitlines():
+        line = line.strip()
+        if line and not line.startswith("#") and "=" in line:
+            k, v = line.split("=", 1)
+            os.environ.setdefault(k.strip(), v.strip().strip('"').strip("'"))
+
+sys.path.insert(0, str(_env_file.parent))
+from sqlalchemy import bindparam, delete, insert, select, text
+from app.database import SessionLocal
+from app.models import SensorReading, SensorType
+
+SEED_DEVICES = 1000
+SAMPLES = 200
+
+
+def seed(db, device_ids, rows, days):
+    """Insert `rows` readings spread over `days` days across device_ids, in SQL."""
+    db.execute(
+        text(
+            """
+            INSERT INTO sensor_readings (id, device_id, sensor_type, value, unit, created_at)
+            SELECT gen_random_uuid(),
+                   (CAST(:device_ids AS uuid[]))[1 + (g % :device_count)],
+                   :sensor_type,
+                   random() * 4095,
+                   'analog',
+                   now() - random() * make_interval(days => :days)
+            FROM generate_series(1, :rows) AS g
+            """
+        ).bindparams(bindparam("sensor_type", type_=SensorReading.__table__.c.sensor_type.type)),
+        {"device_ids": [str(d) for d in device_ids], "device_count": len(device_ids), "rows": rows, "days": days, "sensor_type": SensorType.WATER},
+    )
+    db.commit()
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p99_ms": round(ordered[int(len(ordered) * 0.99) - 1] * 1000, 3),
+    }
+
+
+def measure(db, device_ids):
+    latest, inserts = [], []
+    for i in range(SAMPLES):
+        device_id = device_ids[i % len(device_ids)]
+        started = time.perf_counter()
+        db.execute(
+            select(SensorReading)
+            .where(SensorReading.device_id == device_id, SensorReading.sensor_type == SensorType.WATER)
+            .order_by(SensorReading.created_at.desc())
+            .limit(1)
+        ).first()
+        latest.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        db.execute(
+            insert(SensorReading),
+            [{
+                "id": uuid.uuid4(),
+                "device_id": device_id,
+                "sensor_type": SensorType.WATER,
+                "value": 1.0,
+                "unit": "analog",
+                "created_at": datetime.now(timezone.utc),
+            }],
+        )
+        db.commit()
+        inserts.append(time.perf_counter() - started)
+    return {"latest": percentiles(latest), "insert": percentiles(inserts)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--days", type=int, default=30, help="Spread seeded rows over this many days")
+    parser.add_argument("--yes", action="store_true", help="Confirm seeding into DATABASE_URL")
+    args = parser.parse_args()
+    if not args.yes:
+        print("Refusing to seed without --yes (use a local or scratch database).")
+        sys.exit(1)
+
+    device_ids = [uuid.uuid4() for _ in range(SEED_DEVICES)]
+    seeded = 0
+    db = SessionLocal()
+    try:
+        for size in sorted(args.sizes):
+            seed(db, device_ids, size - seeded, args.days)
+            seeded = size
+            db.execute(text("ANALYZE sensor_readings"))
+            db.commit()
+            result = measure(db, device_ids)
+            print(
+                f"rows={size:>12,d}  latest p50={result['latest']['p50_ms']:8.3f}ms p99={result['latest']['p99_ms']:8.3f}ms"
+                f"  insert p50={result['insert']['p50_ms']:8.3f}ms p99={result['insert']['p99_ms']:8.3f}ms"
+            )
+    finally:
+        db.rollback()
+        db.execute(delete(SensorReading).where(SensorReading.device_id.in_(device_ids)))
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Run from Backend folder: python scripts/bench_sync_vs_async.py --requests 2000
+
+Compares throughput of the sync (psycopg2, threadpool) and async (asyncpg)
+database layers on the two hot paths: ingesting one reading and reading the
+latest one. The sync side uses as many threads as Starlette's default
+threadpool (40); the async side runs --concurrency coroutines on one loop.
+Rows are written under a random device id and deleted afterwards.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+# Load Backend/.env into os.environ (no extra package required)
+_env_file = Path(__file__).resolve().parent.parent / ".env"
+if _env_file.exists():
+    for line in _env_file.read_text().strip().splitlines():
+        line = line.strip()
+        if line and not line.startswith("#") and "=" in line:
+            k, v = line.split("=", 1)
+            os.environ.setdefault(k.strip(), v.strip().strip('"').strip("'"))
+
+sys.path.insert(0, str(_env_file.parent))
+from sqlalchemy import delete, insert, select
+from app.database import AsyncSessionLocal, SessionLocal, async_engine
+from app.models import SensorReading, SensorType
+
+SYNC_THREADS = 40
+
+
+def _row(device_id):
+    return {
+        "id": uuid.uuid4(),
+        "device_id": device_id,
+        "sensor_type": SensorType.WATER,
+        "value": 1.0,
+        "unit": "analog",
+        "raw": None,
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+def _latest(device_id):
+    return (
+        select(SensorReading)
+        .where(SensorReading.device_id == device_id, SensorReading.sensor_type == SensorType.WATER)
+        .order_by(SensorReading.created_at.desc())
+        .limit(1)
+    )
+
+
+def sync_ingest(device_id):
+    with SessionLocal() as db:
+        db.execute(insert(SensorReading), [_row(device_id)])
+        db.commit()
+
+
+def sync_latest(device_id):
+    with SessionLocal() as db:
+        db.execute(_latest(device_id)).scalars().first()
+
+
+async def async_ingest(device_id):
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(SensorReading), [_row(device_id)])
+        await db.commit()
+
+
+async def async_latest(device_id):
+    async with AsyncSessionLocal() as db:
+        (await db.execute(_latest(device_id))).scalars().first()
+
+
+def run_sync(fn, device_id, requests):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(SYNC_THREADS) as pool:
+        list(pool.map(lambda _: fn(device_id), range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+async def run_async(fn, device_id, requests, concurrency):
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            await fn(device_id)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200, help="In-flight coroutines for the async side")
+    args = parser.parse_args()
+
+    device_id = uuid.uuid4()
+    try:
+        results = {
+            "sync_ingest": run_sync(sync_ingest, device_id, args.requests),
+            "sync_latest": run_sync(sync_latest, device_id, args.requests),
+        }
+
+        async def async_side():
+            try:
+                results["async_ingest"] = await run_async(async_ingest, device_id, args.requests, args.concurrency)
+                results["async_latest"] = await run_async(async_latest, device_id, args.requests, args.concurrency)
+            finally:
+                await async_engine.dispose()
+
+        asyncio.run(async_side())
+    finally:
+        with SessionLocal() as db:
+            db.execute(delete(SensorReading).where(SensorReading.device_id == device_id))
+            db.commit()
+
+    for name, rps in results.items():
+        print(f"{name:14s} {rps:10.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Run from Backend folder: python scripts/check_json_routes.py
+
+Calls the read routes that return orjson responses (app/serializers.py) in-process
+against the configured database, so they encode real asyncpg rows, and fails if
+any of them does not return 200. Uses the newest workspace and its creator; the
+database needs at least one workspace with a device.
+"""
+from pathlib import Path
+import asyncio
+import os
+import sys
+
+# Load Backend/.env into os.environ (no extra package required)
+_env_file = Path(__file__).resolve().parent.parent / ".env"
+if _env_file.exists():
+    for line in _env_file.read_text().strip().splitlines():
+        line = line.strip()
+        if line and not line.startswith("#") and "=" in line:
+            k, v = line.split("=", 1)
+            os.environ.setdefault(k.strip(), v.strip().strip('"').strip("'"))
+
+sys.path.insert(0, str(_env_file.parent))
+import httpx
+from sqlalchemy import text
+from app.database import SessionLocal, async_engine
+from app.main import app
+
+
+def pick_ids():
+    with SessionLocal() as db:
+        row = db.execute(
+            text(
+                """
+                SELECT w.id AS workspace_id, w.created_by, d.id AS device_id
+                FROM workspaces w
+                JOIN devices d ON d.workspace_id = w.id
+                ORDER BY w.created_at DESC
+                LIMIT 1
+                """
+            )
+        ).first()
+    if row is None:
+        sys.exit("Needs a workspace with at least one device")
+    return row
+
+
+async def check(workspace_id, user_id, device_id):
+    headers = {"X-User-Id": str(user_id)}
+    paths = [
+        ("/api/devices", {"limit": 5}),
+        ("/api/device-outlets", {"device_id": str(device_id)}),
+        ("/api/workspaces", {"member_user_id": str(user_id), "limit": 5}),
+        (f"/api/workspaces/{workspace_id}/devices", {"limit": 5}),
+        (f"/api/workspaces/{workspace_id}/members", {"limit": 5}),
+        (f"/api/workspaces/{workspace_id}/snapshot", {}),
+    ]
+    failed = []
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+            for path, params in paths:
+                resp = await client.get(path, params=params, headers=headers)
+                print(f"{resp.status_code} {path}")
+                if resp.status_code != 200:
+                    failed.append(f"{path}: {resp.text[:200]}")
+    finally:
+        await async_engine.dispose()
+    return failed
+
+
+def main():
+    row = pick_ids()
+    failed = asyncio.run(check(row.workspace_id, row.created_by, row.device_id))
+    if failed:
+        print("\n".join(failed))
+        sys.exit(1)
+    print("All JSON routes OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Run from Backend folder: python scripts/migrate_outlet_revisions.py [--apply]
+
+Creates device_outlet_revisions, the per-device outlet revisions of
+app/outlet_revisions.py. Run it before deploying the version that stores
+revisions there: outlet PATCH routes bump them in their transaction and fail
+without it. An existing table is skipped. Without --apply the SQL is only printed.
+"""
+from pathlib import Path
+import argparse
+import os
+import sys
+
+# Load Backend/.env into os.environ (no extra package required)
+_env_file = Path(__file__).resolve().parent.parent / ".env"
+if _env_file.exists():
+    for line in _env_file.read_text().strip().splitlines():
+        line = line.strip()
+        if line and not line.startswith("#") and "=" in line:
+            k, v = line.split("=", 1)
+            os.environ.setdefault(k.strip(), v.strip().strip('"').strip("'"))
+
+sys.path.insert(0, str(_env_file.parent))
+from sqlalchemy import create_mock_engine
+from app.database import engine
+from app.models import DeviceOutletRevision
+
+TABLE = DeviceOutletRevision.__table__
+
+
+def print_ddl():
+    def dump(sql, *multiparams, **params):
+        print(str(sql.compile(dialect=mock.dialect)).strip() + ";")
+
+    mock = create_mock_engine(engine.url, dump)
+    # Table.create, unlike metadata.create_all, leaves the metadata's enum types alone.
+    TABLE.create(mock, checkfirst=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apply", action="store_true", help="Execute instead of printing the SQL")
+    args = parser.parse_args()
+
+    if not args.apply:
+        print_ddl()
+        return
+    with engine.begin() as conn:
+        TABLE.create(conn, checkfirst=True)
+    print("Created device_outlet_revisions (if missing)")
+
+
+if __name__ == "__main__":
+    main()
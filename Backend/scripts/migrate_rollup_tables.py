@@ -0,0 +1,53 @@
+"""
+Run from Backend folder: python scripts/migrate_rollup_tables.py [--apply]
+
+Creates the rollup tables of app/rollups.py, sensor_readings_rollup_1m and
+sensor_readings_rollup_1h (and the sensortype enum if it does not exist yet).
+Run it before enabling ROLLUPS_ENABLED or running scripts/backfill_rollups.py.
+Tables that already exist are skipped. Without --apply the SQL is only printed.
+"""
+from pathlib import Path
+import argparse
+import os
+import sys
+
+# Load Backend/.env into os.environ (no extra package required)
+_env_file = Path(__file__).resolve().parent.parent / ".env"
+if _env_file.exists():
+    for line in _env_file.read_text().strip().splitlines():
+        line = line.strip()
+        if line and not line.startswith("#") and "=" in line:
+            k, v = line.split("=", 1)
+            os.environ.setdefault(k.strip(), v.strip().strip('"').strip("'"))
+
+sys.path.insert(0, str(_env_file.parent))
+from sqlalchemy import create_mock_engine
+from app.database import Base, engine
+from app.models import SensorReadingRollup1h, SensorReadingRollup1m
+
+TABLES = [SensorReadingRollup1m.__table__, SensorReadingRollup1h.__table__]
+
+
+def print_ddl():
+    def dump(sql, *multiparams, **params):
+        print(str(sql.compile(dialect=mock.dialect)).strip() + ";")
+
+    mock = create_mock_engine(engine.url, dump)
+    Base.metadata.create_all(mock, tables=TABLES, checkfirst=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apply", action="store_true", help="Execute instead of printing the SQL")
+    args = parser.parse_args()
+
+    if not args.apply:
+        print_ddl()
+        return
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn, tables=TABLES, checkfirst=True)
+    print("Created sensor_readings_rollup_1m / _1h (if missing)")
+
+
+if __name__ == "__main__":
+    main()
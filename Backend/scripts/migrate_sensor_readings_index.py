@@ -0,0 +1,57 @@
+"""
+Run from Backend folder: python scripts/migrate_sensor_readings_index.py [--apply]
+
+Creates the (device_id, sensor_type, created_at DESC) index that /latest, the
+dashboard lookups and the rollups rely on, on an existing unpartitioned
+sensor_readings table. It is built CONCURRENTLY, outside a transaction, so
+ingest keeps writing while it builds; IF NOT EXISTS makes re-runs a no-op.
+Without --apply the SQL is only printed.
+
+A partitioned sensor_readings (scripts/migrate_sensor_readings_partitioned.py)
+already has the index and is left alone. If a concurrent build is interrupted
+it leaves an INVALID index behind; drop it and run this again.
+"""
+from pathlib import Path
+import argparse
+import os
+import sys
+
+# Load Backend/.env into os.environ (no extra package required)
+_env_file = Path(__file__).resolve().parent.parent / ".env"
+if _env_file.exists():
+    for line in _env_file.read_text().strip().splitlines():
+        line = line.strip()
+        if line and not line.startswith("#") and "=" in line:
+            k, v = line.split("=", 1)
+            os.environ.setdefault(k.strip(), v.strip().strip('"').strip("'"))
+
+sys.path.insert(0, str(_env_file.parent))
+from sqlalchemy import text
+from app.database import engine
+from app.partitions import is_partitioned
+
+CREATE_INDEX_SQL = (
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sensor_readings_device_type_created "
+    "ON sensor_readings (device_id, sensor_type, created_at DESC)"
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apply", action="store_true", help="Execute instead of printing the SQL")
+    args = parser.parse_args()
+
+    if not args.apply:
+        print(CREATE_INDEX_SQL + ";")
+        return
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if is_partitioned(conn):
+            print("sensor_readings is partitioned; the index is created by the partition migration")
+            return
+        conn.execute(text(CREATE_INDEX_SQL))
+    print("Created ix_sensor_readings_device_type_created")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Run from Backend folder: python scripts/migrate_sensor_readings_partitioned.py [--granularity daily|monthly] [--apply]
+
+Converts sensor_readings into a table partitioned by RANGE (created_at):
+the existing table is renamed to sensor_readings_legacy, a partitioned parent
+with PRIMARY KEY (id, created_at) and the (device_id, sensor_type, created_at DESC)
+index is created, partitions are created from the oldest row up to
+SENSOR_READINGS_PARTITIONS_AHEAD periods ahead, and rows are copied over.
+Everything runs in one transaction. Without --apply the SQL is only printed.
+
+Grants, RLS policies and triggers on the old table are not copied; re-create
+them on the new parent, check the data, then drop sensor_readings_legacy.
+"""
+from datetime import datetime, timezone
+from pathlib import Path
+import argparse
+import os
+import sys
+
+# Load Backend/.env into os.environ (no extra package required)
+_env_file = Path(__file__).resolve().parent.parent / ".env"
+if _env_file.exists():
+    for line in _env_file.read_text().strip().splitlines():
+        line = line.strip()
+        if line and not line.startswith("#") and "=" in line:
+            k, v = line.split("=", 1)
+            os.environ.setdefault(k.strip(), v.strip().strip('"').strip("'"))
+
+sys.path.insert(0, str(_env_file.parent))
+from sqlalchemy import text
+from app.database import engine
+from app.partitions import PARTITIONS_AHEAD, create_partition_sql, next_period, period_start
+
+
+def build_statements(oldest: datetime, now: datetime, granularity: str) -> list[str]:
+    statements = [
+        "ALTER TABLE sensor_readings RENAME TO sensor_readings_legacy",
+        "ALTER INDEX IF EXISTS ix_sensor_readings_device_type_created RENAME TO ix_sensor_readings_legacy_device_type_created",
+        "CREATE TABLE sensor_readings (LIKE sensor_readings_legacy INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)",
+        "ALTER TABLE sensor_readings ALTER COLUMN created_at SET NOT NULL",
+        "ALTER TABLE sensor_readings ALTER COLUMN created_at SET DEFAULT now()",
+        "ALTER TABLE sensor_readings ADD PRIMARY KEY (id, created_at)",
+        "CREATE INDEX ix_sensor_readings_device_type_created ON sensor_readings (device_id, sensor_type, created_at DESC)",
+    ]
+    start = period_start(oldest, granularity)
+    last = period_start(now, granularity)
+    for _ in range(PARTITIONS_AHEAD):
+        last = next_period(last, granularity)
+    while start <= last:
+        statements.append(create_partition_sql(start, granularity))
+        start = next_period(start, granularity)
+    statements += [
+        "CREATE TABLE sensor_readings_default PARTITION OF sensor_readings DEFAULT",
+        """
+        INSERT INTO sensor_readings (id, device_id, sensor_type, value, unit, raw, created_at)
+        SELECT id, device_id, sensor_type, value, unit, raw, COALESCE(created_at, now())
+        FROM sensor_readings_legacy
+        """.strip(),
+    ]
+    return statements
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--granularity", choices=("daily", "monthly"), default=os.getenv("SENSOR_READINGS_PARTITION", "daily"))
+    parser.add_argument("--apply", action="store_true", help="Execute instead of printing the SQL")
+    args = parser.parse_args()
+
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        oldest = conn.execute(text("SELECT min(created_at) FROM sensor_readings")).scalar() or now
+        statements = build_statements(oldest, now, args.granularity)
+        if not args.apply:
+            for stmt in statements:
+                print(stmt + ";")
+            return
+        for stmt in statements:
+            conn.execute(text(stmt))
+    print(f"Migrated sensor_readings to {args.granularity} partitions ({len(statements)} statements)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import apiClient from './apiClient';
+import { fetchAllPages } from './workspacesApi';
 
 // Types
 export interface DashboardStats {
@@ -150,8 +151,7 @@ export const dashboardApi = {
       return mockDevices;
     }
     
-    const response = await apiClient.get<Device[]>('/api/devices');
-    return response.data;
+    return fetchAllPages<Device>('/api/devices');
   },
 
   /**
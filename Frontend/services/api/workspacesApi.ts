@@ -31,20 +31,28 @@ export interface WorkspaceMemberWithProfile {
 	display_name?: string | null;
 }
 
+// List endpoints are paged; the next page's cursor comes back in X-Next-Cursor.
+export async function fetchAllPages<T>(url: string, params?: Record<string, string>): Promise<T[]> {
+	const items: T[] = [];
+	let cursor: string | undefined;
+	do {
+		const res = await apiClient.get<T[]>(url, {
+			params: cursor ? { ...params, cursor } : params,
+		});
+		items.push(...res.data);
+		cursor = res.headers["x-next-cursor"] || undefined;
+	} while (cursor);
+	return items;
+}
+
 export async function fetchWorkspaceMembers(
 	workspaceId: string,
 ): Promise<WorkspaceMemberWithProfile[]> {
-	const res = await apiClient.get<WorkspaceMemberWithProfile[]>(
-		`/api/workspaces/${workspaceId}/members`,
-	);
-	return res.data;
+	return fetchAllPages<WorkspaceMemberWithProfile>(`/api/workspaces/${workspaceId}/members`);
 }
 
 export async function fetchWorkspaces(userId?: string): Promise<Workspace[]> {
-	const res = await apiClient.get<Workspace[]>("/api/workspaces", {
-		params: userId ? { member_user_id: userId } : undefined,
-	});
-	return res.data;
+	return fetchAllPages<Workspace>("/api/workspaces", userId ? { member_user_id: userId } : undefined);
 }
 
 export async function createWorkspace(payload: { name: string; created_by?: string | null }): Promise<Workspace> {
@@ -53,8 +61,7 @@ export async function createWorkspace(payload: { name: string; created_by?: stri
 }
 
 export async function fetchDevicesForWorkspace(workspaceId: string): Promise<DeviceStrip[]> {
-	const res = await apiClient.get<DeviceStrip[]>(`/api/workspaces/${workspaceId}/devices`);
-	return res.data;
+	return fetchAllPages<DeviceStrip>(`/api/workspaces/${workspaceId}/devices`);
 }
 
 export async function createDevice(payload: { workspace_id: string; device_name: string }): Promise<DeviceStrip> {
@@ -74,3 +81,20 @@ export async function addWorkspaceMemberByEmail(
 	const res = await apiClient.post<WorkspaceMember>(`/api/workspaces/${workspaceId}/members/by-email`, { email, role });
 	return res.data;
 }
+
+export interface BulkInviteResult {
+	email: string;
+	status: "added" | "failed";
+	user_id?: string;
+	role?: MemberRole;
+	status_code?: number;
+	detail?: string;
+}
+
+export async function addWorkspaceMembersByEmail(
+	workspaceId: string,
+	members: { email: string; role?: MemberRole }[],
+): Promise<{ added: number; failed: number; results: BulkInviteResult[] }> {
+	const res = await apiClient.post(`/api/workspaces/${workspaceId}/members/by-email/bulk`, { members });
+	return res.data;
+}
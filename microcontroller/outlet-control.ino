@@ -15,16 +15,29 @@ const char* DEVICE_ID   = "b2c3bd18-1fd6-4a85-b7c5-20e830f86859";
 const char* OUTLET_1_ID = "4c55bc13-ad02-4975-abc7-0b38961eb858";
 const char* OUTLET_2_ID = "d1be7829-615d-454e-a84b-1edc63515bab";
 
-// How often to poll (ms)
+// Long-poll: the server holds the request up to LONG_POLL_WAIT_S seconds
+// until an outlet changes, so we can re-poll immediately after each response.
+const unsigned long LONG_POLL_WAIT_S = 25;
+// Back-off after a failed request (ms)
 const unsigned long POLL_INTERVAL_MS = 3000;
 unsigned long lastPoll = 0;
+bool lastPollFailed = false;
 
-// Fetch both outlets in one call: /api/device-outlets?device_id=...
+// Outlet revision from the last response (X-Outlets-Revision), empty until known
+String outletsRevision = "";
+
+// Fetch both outlets in one call: /api/device-outlets?device_id=...&since=...&wait=...
 bool fetchOutletsForDevice(bool& outlet1Active, bool& outlet2Active) {
   String url = String(BASE_URL) + "/api/device-outlets?device_id=" + DEVICE_ID;
+  if (outletsRevision.length() > 0) {
+    url += "&since=" + outletsRevision + "&wait=" + String(LONG_POLL_WAIT_S);
+  }
 
   HTTPClient http;
   http.begin(url);  // for HTTPS with self‑signed / shared certs you may need http.setInsecure();
+  http.setTimeout((LONG_POLL_WAIT_S + 10) * 1000);
+  const char* headerKeys[] = {"X-Outlets-Revision"};
+  http.collectHeaders(headerKeys, 1);
   int httpCode = http.GET();
 
   if (httpCode != HTTP_CODE_OK) {
@@ -35,6 +48,7 @@ bool fetchOutletsForDevice(bool& outlet1Active, bool& outlet2Active) {
   }
 
   String payload = http.getString();
+  String revision = http.header("X-Outlets-Revision");
   http.end();
 
   // Expecting JSON array:
@@ -78,6 +92,10 @@ bool fetchOutletsForDevice(bool& outlet1Active, bool& outlet2Active) {
     Serial.println("Did not find both outlet IDs in response");
   }
 
+  if (revision.length() > 0) {
+    outletsRevision = revision;
+  }
+
   return found1 && found2;
 }
 
@@ -119,13 +137,14 @@ void loop() {
   }
 
   unsigned long now = millis();
-  if (now - lastPoll >= POLL_INTERVAL_MS) {
+  if (!lastPollFailed || now - lastPoll >= POLL_INTERVAL_MS) {
     lastPoll = now;
 
     bool outlet1Active = false;
     bool outlet2Active = false;
 
     bool ok = fetchOutletsForDevice(outlet1Active, outlet2Active);
+    lastPollFailed = !ok;
 
     if (ok) {
       applyRelayStates(outlet1Active, outlet2Active);